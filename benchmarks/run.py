@@ -0,0 +1,312 @@
+# Benchmark suite for the password generator.
+#
+#   python -m benchmarks.run                      run everything, print a table, write results JSON
+#   python -m benchmarks.run --save-baseline      also store the results as the baseline
+#   python -m benchmarks.run --quick -k PIN       fewer repeats, only cases matching "PIN"
+#   python -m benchmarks.run --seed 1             generate from a seeded source, so every run
+#                                                 produces the same passwords
+#
+# Each case measures per-call latency through generate_password, bulk throughput through
+# generate_batch at several sizes, and peak traced memory of the largest batch. Import time
+# of the package, and of everything main.py imports at startup besides Streamlit, is measured
+# in fresh interpreters and checked against a fixed budget. When a baseline exists, every
+# metric is compared against it. The run exits with status 1 if any metric regressed past the
+# threshold or an import went over its budget.
+import argparse
+import ast
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import timeit
+import tracemalloc
+from datetime import datetime
+
+from password_generator import (
+    RNG_SOURCES,
+    calculate_strength,
+    estimate_entropy,
+    generate_batch,
+    generate_password,
+    make_source,
+)
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(BENCHMARK_DIR, "baseline.json")
+DEFAULT_OUTPUT = os.path.join(BENCHMARK_DIR, "results.json")
+APP_PATH = os.path.join(os.path.dirname(BENCHMARK_DIR), "main.py")
+
+# Allowed slowdown before a metric counts as a regression, as a fraction of the baseline
+DEFAULT_THRESHOLD = 0.15
+DEFAULT_MEMORY_THRESHOLD = 0.10
+
+# Batch sizes for the throughput measurements
+BATCH_SIZES = [100, 10000, 100000]
+QUICK_BATCH_SIZES = [100, 10000]
+
+# Generation cases: name, mode, options
+CASES = [
+    ("Random/16", "Random", {'length': 16}),
+    ("Random/64", "Random", {'length': 64}),
+    ("Random/16 no special", "Random", {'length': 16, 'use_special': False}),
+    ("Random/16 exclude similar+ambiguous", "Random",
+     {'length': 16, 'exclude_similar': True, 'exclude_ambiguous': True}),
+    ("Random/16 any types", "Random", {'length': 16, 'ensure_all_types': False}),
+    ("Pronounceable/10", "Pronounceable", {'length': 10}),
+    ("Pronounceable/20 letters only", "Pronounceable", {'length': 20, 'add_number': False, 'add_special': False}),
+    ("PIN/6", "PIN", {'length': 6}),
+    ("PIN/6 unconstrained", "PIN", {'length': 6, 'avoid_repeats': False, 'avoid_sequences': False}),
+    ("PIN/12", "PIN", {'length': 12}),
+    ("Passphrase/4", "Passphrase", {'word_count': 4}),
+    ("Passphrase/8 capitalized", "Passphrase", {'word_count': 8, 'capitalize_words': True}),
+    ("Custom Pattern/Aaaa-9999-####", "Custom Pattern", {'pattern': "Aaaa-9999-####"}),
+    ("Custom Pattern/hex32", "Custom Pattern", {'pattern': "[a-f0-9]{32}"}),
+]
+
+# Cases timed per password with each randomness source, where per-draw overhead dominates:
+# metric prefix, mode, options
+RNG_CASES = [
+    ("random_16", "Random", {'length': 16}),
+    ("pin_6", "PIN", {'length': 6}),
+    ("passphrase_4", "Passphrase", {'word_count': 4}),
+]
+
+# Import-time budgets in milliseconds: the cold-start cost a scaled-to-zero app container pays
+# before the first page renders, on top of the interpreter and Streamlit themselves
+IMPORT_BUDGETS = {
+    "Import": 15.0,
+    "App import": 60.0,
+}
+
+# Metrics where a larger value is better; every other metric is better smaller
+HIGHER_IS_BETTER = ("per_second",)
+
+
+# Function to time fn and return the median seconds per call over several repeats
+def _per_call(fn, repeats):
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    return statistics.median(timer.repeat(repeat=repeats, number=number)) / number
+
+
+# Function to get the peak traced memory in bytes while fn runs
+def _peak_memory(fn):
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+# Function to benchmark one generation case, drawing from rng if given
+def bench_case(mode, options, batch_sizes, repeats, rng=None):
+    result = {'latency_us': _per_call(lambda: generate_password(mode, options, rng), repeats) * 1e6}
+    for n in batch_sizes:
+        seconds = _per_call(lambda: generate_batch(mode, options, n, rng), max(repeats // 2, 1))
+        result[f'batch_{n}_per_second'] = n / seconds
+    largest = batch_sizes[-1]
+    result[f'batch_{largest}_peak_bytes'] = _peak_memory(lambda: generate_batch(mode, options, largest, rng))
+    return result
+
+
+# Function to benchmark single-password latency with one randomness source
+def bench_rng(name, repeats, seed=None):
+    source = make_source(name, seed)
+    return {f'{prefix}_latency_us': _per_call(lambda: generate_password(mode, options, source), repeats) * 1e6
+            for prefix, mode, options in RNG_CASES}
+
+
+# Function to benchmark strength scoring and entropy estimation on a fixed password mix
+def bench_strength(repeats):
+    passwords = generate_batch("Random", {'length': 16}, 200) + generate_batch("Passphrase", {'word_count': 4}, 200)
+    passwords += ["password", "Password123!", "qwerty2024", "aaaa1111", "Summer1987!"]
+
+    # Entropy estimates are not cached (a cache would keep passwords in memory), so the same
+    # passwords are timed on every call
+    return {
+        'strength_latency_us': _per_call(lambda: [calculate_strength(p) for p in passwords], repeats)
+        / len(passwords) * 1e6,
+        'entropy_latency_us': _per_call(lambda: [estimate_entropy(p) for p in passwords], repeats)
+        / len(passwords) * 1e6,
+    }
+
+
+# Function to get the import statements main.py runs at the top level, leaving out Streamlit.
+# Imports inside functions and branches are deferred and so are not part of the cold start.
+def app_imports(path=APP_PATH):
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    statements = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            names = [alias for alias in node.names if alias.name.split(".")[0] != "streamlit"]
+            if names:
+                statements.append(ast.unparse(ast.Import(names=names)))
+        elif isinstance(node, ast.ImportFrom) and node.module.split(".")[0] != "streamlit":
+            statements.append(ast.unparse(node))
+    return "\n".join(statements)
+
+
+# Function to measure the wall time of running import statements in a fresh interpreter, best of repeats
+def bench_import(statement, repeats):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", statement], check=True,
+                       cwd=os.path.dirname(BENCHMARK_DIR))
+        times.append(time.perf_counter() - start)
+    baseline = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", "pass"], check=True)
+        baseline.append(time.perf_counter() - start)
+    # Subtract the bare interpreter startup so only the import itself is left
+    return {'import_ms': max(min(times) - min(baseline), 0.0) * 1e3}
+
+
+# Function to run the selected benchmarks and return the results document.
+# With rng set, generation cases draw from that source, freshly created (and seeded with seed)
+# for each case so a case's passwords do not depend on which other cases ran.
+def run(pattern=None, quick=False, rng=None, seed=None):
+    repeats = 3 if quick else 7
+    batch_sizes = QUICK_BATCH_SIZES if quick else BATCH_SIZES
+    results = {}
+    for name, mode, options in CASES:
+        if pattern and pattern.lower() not in name.lower():
+            continue
+        print(f"  {name}", file=sys.stderr)
+        results[name] = bench_case(mode, options, batch_sizes, repeats, make_source(rng, seed) if rng else None)
+    for source in RNG_SOURCES:
+        name = f"RNG/{source}"
+        if pattern and pattern.lower() not in name.lower():
+            continue
+        print(f"  {name}", file=sys.stderr)
+        results[name] = bench_rng(source, repeats, seed)
+    if not pattern or pattern.lower() in "strength":
+        print("  Strength", file=sys.stderr)
+        results["Strength"] = bench_strength(repeats)
+    if not pattern or pattern.lower() in "import":
+        print("  Import", file=sys.stderr)
+        results["Import"] = bench_import("import password_generator", repeats)
+        print("  App import", file=sys.stderr)
+        results["App import"] = bench_import(app_imports(), repeats)
+    return {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec="seconds"),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'quick': quick,
+            'rng': rng,
+            'seed': seed,
+        },
+        'results': results,
+    }
+
+
+# Function to compare results against a baseline, returning (rows, regressions).
+# Each row is (case, metric, baseline, current, relative change where positive is worse).
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD, memory_threshold=DEFAULT_MEMORY_THRESHOLD):
+    rows = []
+    regressions = []
+    for case, metrics in results['results'].items():
+        for metric, current in metrics.items():
+            previous = baseline['results'].get(case, {}).get(metric)
+            if not previous:
+                continue
+            if metric.endswith(HIGHER_IS_BETTER):
+                change = previous / current - 1 if current else float("inf")
+            else:
+                change = current / previous - 1
+            limit = memory_threshold if metric.endswith("_bytes") else threshold
+            row = (case, metric, previous, current, change)
+            rows.append(row)
+            if change > limit:
+                regressions.append(row)
+    return rows, regressions
+
+
+# Function to check import times against their budgets, returning (case, measured, budget) for each one over
+def check_budgets(results, budgets=IMPORT_BUDGETS):
+    over = []
+    for case, budget in budgets.items():
+        measured = results['results'].get(case, {}).get('import_ms')
+        if measured is not None and measured > budget:
+            over.append((case, measured, budget))
+    return over
+
+
+# Function to format a metric value for the report
+def _format_value(metric, value):
+    if metric.endswith("_bytes"):
+        return f"{value / 1024:,.0f} KiB"
+    if metric.endswith("_per_second"):
+        return f"{value:,.0f}/s"
+    if metric.endswith("_us"):
+        return f"{value:,.2f} µs"
+    return f"{value:,.1f} ms"
+
+
+def print_results(results):
+    for case, metrics in results['results'].items():
+        print(case)
+        for metric, value in metrics.items():
+            print(f"    {metric:<28} {_format_value(metric, value):>16}")
+
+
+def print_comparison(rows, regressions):
+    print("\nCompared with baseline (positive change is worse):")
+    for case, metric, previous, current, change in rows:
+        flag = "  REGRESSION" if (case, metric, previous, current, change) in regressions else ""
+        print(f"  {case:<38} {metric:<28} {_format_value(metric, previous):>16} -> "
+              f"{_format_value(metric, current):>16} {change:+7.1%}{flag}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="benchmarks.run", description="Password generator benchmarks")
+    parser.add_argument("-k", "--filter", help="Only run cases whose name contains this text")
+    parser.add_argument("--quick", action="store_true", help="Fewer repeats and smaller batches")
+    parser.add_argument("-o", "--output", default=DEFAULT_OUTPUT, help="Results JSON to write")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline JSON to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="Store these results as the baseline")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Allowed slowdown as a fraction of the baseline")
+    parser.add_argument("--memory-threshold", type=float, default=DEFAULT_MEMORY_THRESHOLD,
+                        help="Allowed peak memory growth as a fraction of the baseline")
+    parser.add_argument("--rng", choices=RNG_SOURCES,
+                        help="Randomness source for the generation cases (default: the built-in ones)")
+    parser.add_argument("--seed", type=int, help="Seed for --rng seeded; implies it when --rng is not given")
+    args = parser.parse_args(argv)
+    if args.seed is not None and args.rng is None:
+        args.rng = "seeded"
+
+    results = run(args.filter, args.quick, args.rng, args.seed)
+    print_results(results)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+
+    status = 0
+    for case, measured, budget in check_budgets(results):
+        print(f"{case} took {measured:.1f} ms, over its {budget:.0f} ms budget", file=sys.stderr)
+        status = 1
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        rows, regressions = compare(results, baseline, args.threshold, args.memory_threshold)
+        print_comparison(rows, regressions)
+        if regressions:
+            print(f"\n{len(regressions)} metric(s) regressed past the threshold", file=sys.stderr)
+            status = 1
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nSaved baseline to {args.baseline}", file=sys.stderr)
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
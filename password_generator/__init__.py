@@ -0,0 +1,71 @@
+# Headless password generation engine.
+# Importing this package must stay cheap and must not pull in Streamlit or pyperclip,
+# so it can be used from workers and batch jobs as well as from the UI in main.py.
+# Names are exported lazily: a submodule is only imported the first time one of its names
+# is used, so e.g. the Streamlit app never pays for the service, audit or export modules.
+from importlib import import_module
+
+# Submodule -> names it exports from the package
+_SUBMODULE_EXPORTS = {
+    "audit": ("AuditReport", "audit_chunk", "iter_audit", "run_audit"),
+    "batch": ("generate_batch",),
+    "bloom": ("BloomFilter", "bloom_parameters", "build_bloom_filter"),
+    "breach": (
+        "check_password_breach", "get_breach_filter", "get_breach_index", "set_breach_filter",
+        "set_breach_index", "weak_pattern",
+    ),
+    "breach_index": ("BreachIndex", "build_breach_index"),
+    "constants": (
+        "AMBIGUOUS_CHARS", "COMMON_WORDS", "CONSONANTS", "DIGITS", "GENERATION_MODES", "LOWERCASE",
+        "SIMILAR_CHARS", "SPECIAL_CHARS", "UPPERCASE", "VOWELS",
+    ),
+    "delivery": ("EXPORT_MIME_TYPES", "LazyExport", "encode_export", "export_filename"),
+    "entropy": ("EntropyEstimate", "add_dictionary", "estimate_entropy", "load_dictionary"),
+    "export": (
+        "EXPORT_FORMATS", "export_columns", "iter_export_chunks", "iter_passwords", "iter_rows",
+        "write_export",
+    ),
+    "fingerprint": ("FingerprintIndex", "FingerprintSet", "password_fingerprint"),
+    "generators": (
+        "MODE_FUNCTIONS", "generate_custom_password", "generate_passphrase", "generate_password",
+        "generate_pin", "generate_pronounceable_password", "generate_random_password",
+    ),
+    "history": ("MemoryHistoryStore", "SQLiteHistoryStore", "mask_password", "open_history_store"),
+    "markov": (
+        "MarkovModel", "get_markov_model", "pronounceable_entropy", "pronounceable_length", "pronounceable_letters",
+    ),
+    "metrics": ("METRICS_ENABLED", "render_metrics", "reset_metrics", "serve_metrics", "write_metrics"),
+    "parallel": ("generate_parallel", "iter_parallel", "iter_parallel_shards"),
+    "pattern": ("PATTERN_POOLS", "CompiledPattern", "compile_pattern", "pattern_entropy"),
+    "pin": ("pin_entropy", "pin_keyspace", "unrank_pin"),
+    "policy": ("PasswordPolicy", "compile_policy"),
+    "pool": ("PasswordPool", "close_pools", "get_pool"),
+    "pools": ("CharPool", "get_char_pool"),
+    "rng": ("DEFAULT_SOURCE", "RNG_SOURCES", "BufferedSource", "SecretsSource", "SeededSource", "make_source"),
+    "sampling": ("random_bytes", "sample_below", "sample_bytes", "sample_chars"),
+    "service": ("BatchQueue", "PasswordService", "serve"),
+    "strength": ("calculate_strength", "score_batch"),
+    "unique": ("NamespaceWarning", "generate_unique", "iter_unique", "mode_keyspace"),
+    "wordlist": (
+        "FilteredWordList", "WordList", "available_wordlists", "build_wordlist", "default_wordlist",
+        "load_wordlist", "passphrase_entropy", "resolve_wordlist", "wordlist_path",
+    ),
+}
+
+_EXPORTS = {name: module for module, names in _SUBMODULE_EXPORTS.items() for name in names}
+
+__all__ = sorted(_EXPORTS)
+
+
+# Function to import an exported name's submodule on first use (PEP 562)
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,238 @@
+import hashlib
+import mmap
+import os
+from array import array
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from .breach import get_breach_filter, get_breach_index, set_breach_filter, set_breach_index, weak_pattern
+from .export import format_rows
+from .fingerprint import FingerprintSet, digest_fingerprint
+from .strength import score_batch
+
+AUDIT_FORMATS = ["plain", "sha1"]
+
+# Bytes of input each worker task reads, rounded up to the end of a line
+DEFAULT_AUDIT_CHUNK = 8 << 20
+
+# How many of the most reused passwords the report lists
+TOP_REUSED = 10
+
+
+# Function to split a memory-mapped file into byte ranges of about chunk_size that end on line breaks
+def chunk_bounds(mm, chunk_size=DEFAULT_AUDIT_CHUNK):
+    size = len(mm)
+    start = 0
+    while start < size:
+        end = min(start + chunk_size, size)
+        if end < size:
+            newline = mm.find(b"\n", end - 1)
+            end = size if newline < 0 else newline + 1
+        yield start, end
+        start = end
+
+
+# Function to get the columns of audit rows for an input format
+def audit_columns(input_format="plain", breach=False, include_passwords=False):
+    columns = ['password'] if include_passwords and input_format == "plain" else []
+    columns.append('sha1')
+    if input_format == "plain":
+        columns += ['strength', 'category', 'weak_pattern']
+    if breach:
+        columns.append('breached')
+    return columns
+
+
+# Function run once in every audit worker to open the breach data it was given
+def _init_audit_worker(index_path=None, filter_path=None):
+    if index_path:
+        set_breach_index(index_path)
+    if filter_path:
+        set_breach_filter(filter_path)
+
+
+# Function to check a SHA-1 digest against the breach filter and index. Plaintext and SHA-1
+# input are both checked this way, so the breach counts of the two formats agree; the
+# weak-pattern rules of check_password_breach are reported separately.
+def _digest_breached(digest, index, bloom):
+    if bloom is not None and not bloom.might_contain(digest):
+        return False
+    if index is not None:
+        return index.contains_digest(digest)
+    return True
+
+
+# Function run in a worker to audit the lines in one byte range of the input.
+# Returns (formatted rows or None, stats, fingerprints of the lines as packed bytes).
+def audit_chunk(path, start, end, input_format="plain", breach=False, output_format=None, include_passwords=False,
+                header=False):
+    with open(path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            data = mm[start:end]
+    lines = [line.rstrip(b"\r") for line in data.split(b"\n")]
+    lines = [line for line in lines if line]
+
+    index = get_breach_index() if breach else None
+    bloom = get_breach_filter() if breach else None
+    stats = {'rows': len(lines), 'categories': Counter(), 'scores': Counter(), 'breached': 0, 'weak': 0,
+             'invalid': 0}
+    rows = []
+    fingerprints = []
+
+    if input_format == "plain":
+        passwords = [line.decode("utf-8", "replace") for line in lines]
+        scores = score_batch(passwords)
+        for password, (strength, category, color, feedback) in zip(passwords, scores):
+            digest = hashlib.sha1(password.encode("utf-8")).digest()
+            fingerprints.append(digest_fingerprint(digest))
+            stats['categories'][category] += 1
+            stats['scores'][strength] += 1
+            row = {'password': password} if include_passwords else {}
+            row.update(sha1=digest.hex().upper(), strength=strength, category=category,
+                       weak_pattern=weak_pattern(password) is not None)
+            stats['weak'] += row['weak_pattern']
+            if breach:
+                row['breached'] = _digest_breached(digest, index, bloom)
+                stats['breached'] += row['breached']
+            rows.append(row)
+    elif input_format == "sha1":
+        for line in lines:
+            # Accept HASH or HASH:COUNT lines, as in Pwned Passwords dumps
+            try:
+                digest = bytes.fromhex(line[:40].decode("ascii"))
+            except (UnicodeDecodeError, ValueError):
+                digest = b""
+            if len(digest) != 20:
+                stats['invalid'] += 1
+                continue
+            fingerprints.append(digest_fingerprint(digest))
+            row = {'sha1': digest.hex().upper()}
+            if breach:
+                row['breached'] = _digest_breached(digest, index, bloom)
+                stats['breached'] += row['breached']
+            rows.append(row)
+    else:
+        raise ValueError(f"Unknown audit input format: {input_format}")
+
+    text = None
+    if output_format:
+        text = format_rows(rows, output_format, audit_columns(input_format, breach, include_passwords), header)
+    return text, stats, array('Q', fingerprints).tobytes()
+
+
+# Aggregate results of an audit: strength distribution, breach rate and password reuse.
+# Reuse is tracked with a compact fingerprint set, so only repeated passwords take a dict entry.
+class AuditReport:
+    def __init__(self, input_format="plain", breach=False):
+        self.input_format = input_format
+        self.breach = breach
+        self.rows = 0
+        self.invalid = 0
+        self.breached = 0
+        self.weak = 0
+        self.categories = Counter()
+        self.scores = Counter()
+        self._seen = FingerprintSet()
+        # Fingerprint -> times seen, for passwords that occur more than once
+        self._reused = Counter()
+
+    # Function to fold one chunk's results into the report
+    def add(self, stats, fingerprints):
+        self.rows += stats['rows'] - stats['invalid']
+        self.invalid += stats['invalid']
+        self.breached += stats['breached']
+        self.weak += stats['weak']
+        self.categories.update(stats['categories'])
+        self.scores.update(stats['scores'])
+        seen = self._seen
+        reused = self._reused
+        packed = array('Q')
+        packed.frombytes(fingerprints)
+        for fingerprint in packed:
+            if not seen.add(fingerprint):
+                reused[fingerprint] += 1
+
+    # Function to get the report as a JSON-ready dict
+    def summary(self):
+        duplicates = sum(self._reused.values())
+        report = {
+            'rows': self.rows,
+            'invalid_lines': self.invalid,
+            'reuse': {
+                'unique': len(self._seen),
+                'duplicate_rows': duplicates,
+                'reused_passwords': len(self._reused),
+                'reuse_rate': duplicates / self.rows if self.rows else 0.0,
+                # Occurrence counts of the most reused passwords (fingerprints are not reversible)
+                'top_counts': [count + 1 for fingerprint, count in self._reused.most_common(TOP_REUSED)],
+            },
+        }
+        if self.input_format == "plain":
+            report['strength'] = {
+                'categories': dict(self.categories),
+                'scores': {str(score): count for score, count in sorted(self.scores.items())},
+                # Common passwords and easily cracked patterns, counted apart from breach hits
+                'weak_patterns': self.weak,
+            }
+        if self.breach:
+            report['breach'] = {
+                'breached': self.breached,
+                'breach_rate': self.breached / self.rows if self.rows else 0.0,
+            }
+        return report
+
+
+# Function to audit a credential file, yielding (formatted rows or None, stats, fingerprints)
+# per chunk in input order. With workers other than 1 the chunks are fanned out to a process
+# pool (None uses every core) with a bounded number in flight.
+def iter_audit(path, input_format="plain", breach=False, output_format=None, include_passwords=False,
+               workers=1, chunk_size=DEFAULT_AUDIT_CHUNK, index_path=None, filter_path=None):
+    if input_format not in AUDIT_FORMATS:
+        raise ValueError(f"Unknown audit input format: {input_format}")
+    if breach:
+        _init_audit_worker(index_path, filter_path)
+        if get_breach_index() is None and get_breach_filter() is None:
+            raise ValueError("Breach auditing needs a breach index or filter "
+                             "(PASSWORD_BREACH_INDEX or PASSWORD_BREACH_FILTER)")
+
+    with open(path, "rb") as f:
+        if not os.fstat(f.fileno()).st_size:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            bounds = list(chunk_bounds(mm, chunk_size))
+
+    tasks = [(path, start, end, input_format, breach, output_format, include_passwords, i == 0)
+             for i, (start, end) in enumerate(bounds)]
+    if workers == 1:
+        for task in tasks:
+            yield audit_chunk(*task)
+        return
+
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_audit_worker,
+                             initargs=(index_path, filter_path)) as executor:
+        pending = []
+        tasks = iter(tasks)
+        for task in tasks:
+            pending.append(executor.submit(audit_chunk, *task))
+            if len(pending) >= workers * 2:
+                break
+        while pending:
+            future = pending.pop(0)
+            task = next(tasks, None)
+            if task is not None:
+                pending.append(executor.submit(audit_chunk, *task))
+            yield future.result()
+
+
+# Function to audit a credential file, streaming rows to out (if given) and returning the report
+def run_audit(path, out=None, input_format="plain", breach=False, output_format="csv", include_passwords=False,
+              workers=1, chunk_size=DEFAULT_AUDIT_CHUNK, index_path=None, filter_path=None):
+    report = AuditReport(input_format, breach)
+    chunks = iter_audit(path, input_format, breach, output_format if out is not None else None, include_passwords,
+                        workers, chunk_size, index_path, filter_path)
+    for text, stats, fingerprints in chunks:
+        if out is not None:
+            out.write(text)
+        report.add(stats, fingerprints)
+    return report.summary()
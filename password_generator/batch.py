@@ -0,0 +1,126 @@
+import math
+
+from .constants import DIGITS, SPECIAL_CHARS
+from .generators import generate_password
+from .markov import get_markov_model, pronounceable_letters
+from .metrics import METRICS_ENABLED, instrumented, record_rejections
+from .pattern import compile_pattern
+from .pin import pin_keyspace, unrank_pin
+from .policy import MIN_ACCEPTANCE, compile_policy
+from .sampling import sample_below, sample_chars
+from .wordlist import resolve_wordlist
+
+# Function to split a flat string into consecutive pieces of the same length
+def _chunks(text, size, count):
+    return [text[i * size:(i + 1) * size] for i in range(count)]
+
+
+# Function to generate n Random-mode passwords in one batch from the compiled policy
+def _random_batch(n, length, use_lower=True, use_upper=True, use_digits=True, use_special=True,
+                  exclude_similar=False, exclude_ambiguous=False, ensure_all_types=True, rng=None):
+    return compile_policy(length, use_lower, use_upper, use_digits, use_special,
+                          exclude_similar, exclude_ambiguous, ensure_all_types).generate_batch(n, rng)
+
+
+# Function to generate n pronounceable passwords in one batch, with the letters, numbers and
+# special characters for the whole batch each drawn at once
+def _pronounceable_batch(n, length, capitalize=True, add_number=True, add_special=True, wordlist=None, rng=None):
+    letters = pronounceable_letters(length, add_number, add_special)
+    passwords = get_markov_model(wordlist).sample_batch(n, letters, rng)
+    if capitalize:
+        passwords = [password.capitalize() for password in passwords]
+    if add_number:
+        passwords = [f"{password}{number:02d}" for password, number in zip(passwords, sample_below(100, n, rng))]
+    if add_special:
+        passwords = [password + special for password, special in zip(passwords, sample_chars(SPECIAL_CHARS, n, rng))]
+    return passwords
+
+
+# Function to generate n PINs in one batch.
+# Without constraints every digit string is valid; otherwise each PIN is decoded from a
+# uniform rank among the valid PINs, which keeps the batch exactly uniform with no rejection.
+def _pin_batch(n, length, avoid_repeats=True, avoid_sequences=True, rng=None):
+    if not (avoid_repeats or avoid_sequences) or length < 2:
+        return _chunks(sample_chars(DIGITS, n * length, rng), length, n)
+    keyspace = pin_keyspace(length, avoid_repeats, avoid_sequences)
+    return [unrank_pin(rank, length, avoid_repeats, avoid_sequences) for rank in sample_below(keyspace, n, rng)]
+
+
+# Function to generate n Custom Pattern passwords in one batch from the compiled pattern
+def _custom_batch(n, pattern, rng=None):
+    return compile_pattern(pattern).generate_batch(n, rng)
+
+
+# Function to draw n sets of k distinct positions in range(size), each uniformly in order.
+# Position j of every set is drawn from the size - j positions still unused, in one CSPRNG
+# draw per position, and mapped through a sparse Fisher-Yates shuffle.
+def _distinct_positions(n, k, size, rng=None):
+    columns = [sample_below(size - j, n, rng) for j in range(k)]
+    results = []
+    for i in range(n):
+        swapped = {}
+        positions = []
+        for j in range(k):
+            pick = j + columns[j][i]
+            positions.append(swapped.get(pick, pick))
+            swapped[pick] = swapped.get(j, j)
+        results.append(positions)
+    return results
+
+
+# Function to generate n passphrases in one batch.
+# Word positions for every passphrase come from one CSPRNG draw; the rare passphrases that
+# repeat a word are redrawn, matching generate_passphrase's sampling without replacement.
+# When repeats would not be rare, the positions are drawn without replacement instead.
+def _passphrase_batch(n, word_count, separator="-", capitalize_words=False, add_number=True, wordlist=None,
+                      min_word_length=None, max_word_length=None, charset=None, rng=None):
+    words = resolve_wordlist(wordlist, min_word_length, max_word_length, charset)
+    if word_count > len(words):
+        raise ValueError("Sample larger than population or is negative")
+
+    phrases = []
+    rounds = attempts = 0
+    if math.perm(len(words), word_count) / len(words) ** word_count < MIN_ACCEPTANCE:
+        phrases = [[words[p] for p in positions]
+                   for positions in _distinct_positions(n, word_count, len(words), rng)]
+    while len(phrases) < n:
+        needed = n - len(phrases)
+        draws = sample_below(len(words), needed * word_count, rng)
+        for i in range(needed):
+            positions = draws[i * word_count:(i + 1) * word_count]
+            if len(set(positions)) == word_count:
+                phrases.append([words[p] for p in positions])
+        rounds += 1
+        attempts += needed
+    if METRICS_ENABLED:
+        record_rejections("passphrase_batch", rounds, attempts - n)
+
+    if capitalize_words:
+        phrases = [[word.capitalize() for word in phrase] for phrase in phrases]
+    passphrases = [separator.join(phrase) for phrase in phrases]
+    if add_number:
+        numbers = sample_below(90, n, rng)
+        passphrases = [f"{phrase}{separator}{number + 10}" for phrase, number in zip(passphrases, numbers)]
+    return passphrases
+
+
+# Modes with a dedicated batch implementation
+BATCH_FUNCTIONS = {
+    "Random": _random_batch,
+    "Pronounceable": _pronounceable_batch,
+    "PIN": _pin_batch,
+    "Passphrase": _passphrase_batch,
+    "Custom Pattern": _custom_batch,
+}
+
+
+# Function to generate n passwords for a mode in a single batch.
+# Modes without a batch implementation fall back to one generate_password call per password.
+# rng is an optional randomness source (see rng.py); without one the OS CSPRNG is read directly.
+@instrumented("generate_batch")
+def generate_batch(mode, options, n, rng=None):
+    if n <= 0:
+        return []
+    if mode in BATCH_FUNCTIONS:
+        return BATCH_FUNCTIONS[mode](n, **options, rng=rng)
+    return [generate_password(mode, options, rng) for _ in range(n)]
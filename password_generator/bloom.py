@@ -0,0 +1,129 @@
+import math
+import mmap
+import os
+import struct
+
+from .breach_index import DIGEST_SIZE, BreachIndex
+
+# File layout: magic, bit count, hash count, then the bit array
+MAGIC = b"PGBLOOM1"
+HEADER = struct.Struct(">8sQI")
+
+DEFAULT_FP_RATE = 0.01
+
+
+# Function to size a Bloom filter for an expected item count and false-positive rate
+def bloom_parameters(expected_items, fp_rate=DEFAULT_FP_RATE):
+    if not 0 < fp_rate < 1:
+        raise ValueError("False-positive rate must be between 0 and 1")
+    expected_items = max(expected_items, 1)
+    num_bits = math.ceil(-expected_items * math.log(fp_rate) / math.log(2) ** 2)
+    num_bits = (num_bits + 7) // 8 * 8
+    num_hashes = max(1, round(num_bits / expected_items * math.log(2)))
+    return num_bits, num_hashes
+
+
+# Bloom filter over SHA-1 digests.
+# Digests are already uniformly distributed, so probe positions come straight from
+# their bytes by double hashing instead of rehashing the input.
+class BloomFilter:
+    def __init__(self, num_bits, num_hashes, bits=None):
+        self.num_bits = num_bits
+        self.num_hashes = num_hashes
+        self.bits = bits if bits is not None else bytearray(num_bits // 8)
+        self._mm = None
+
+    # Function to open a saved filter memory-mapped, so only probed pages are read
+    @classmethod
+    def open(cls, path):
+        with open(path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, num_bits, num_hashes = HEADER.unpack_from(mm)
+        if magic != MAGIC or len(mm) != HEADER.size + num_bits // 8:
+            mm.close()
+            raise ValueError(f"{path} is not a breach filter")
+        bloom = cls(num_bits, num_hashes, memoryview(mm)[HEADER.size:])
+        bloom._mm = mm
+        return bloom
+
+    def close(self):
+        if self._mm is not None:
+            self.bits.release()
+            self._mm.close()
+            self._mm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _positions(self, digest):
+        h1 = int.from_bytes(digest[:8], "big")
+        h2 = int.from_bytes(digest[8:16], "big") | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, digest):
+        bits = self.bits
+        for position in self._positions(digest):
+            bits[position >> 3] |= 1 << (position & 7)
+
+    # Function to test a digest: False means definitely absent, True means probably present
+    def might_contain(self, digest):
+        bits = self.bits
+        num_bits = self.num_bits
+        h1 = int.from_bytes(digest[:8], "big")
+        h2 = int.from_bytes(digest[8:16], "big") | 1
+        for i in range(self.num_hashes):
+            position = (h1 + i * h2) % num_bits
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, self.num_bits, self.num_hashes))
+            f.write(self.bits)
+
+
+# Function to yield SHA-1 digests from a text hash list ("HASH" or "HASH:COUNT" lines)
+def iter_hash_file(path):
+    with open(path, "r", encoding="ascii") as f:
+        for line in f:
+            sha1_hex = line.split(":", 1)[0].strip()
+            if sha1_hex:
+                digest = bytes.fromhex(sha1_hex)
+                if len(digest) != DIGEST_SIZE:
+                    raise ValueError(f"Not a SHA-1 hash: {sha1_hex}")
+                yield digest
+
+
+# Function to yield every SHA-1 digest stored in a breach index file
+def iter_index_file(path):
+    with BreachIndex(path) as index:
+        for position in range(len(index)):
+            yield index._digest_at(position)
+
+
+# Function to build a Bloom filter from a hash list or breach index file and save it.
+# expected_items defaults to the number of hashes in the source, which costs an extra pass for text files.
+def build_bloom_filter(source_path, dest_path, fp_rate=DEFAULT_FP_RATE, expected_items=None, from_index=False):
+    read_digests = iter_index_file if from_index else iter_hash_file
+    if expected_items is None:
+        if from_index:
+            with BreachIndex(source_path) as index:
+                expected_items = len(index)
+        else:
+            expected_items = sum(1 for _ in read_digests(source_path))
+
+    bloom = BloomFilter(*bloom_parameters(expected_items, fp_rate))
+    count = 0
+    for digest in read_digests(source_path):
+        bloom.add(digest)
+        count += 1
+
+    # Write to a temporary name first so readers never map a half-written filter
+    bloom.save(dest_path + ".tmp")
+    os.replace(dest_path + ".tmp", dest_path)
+    return count, bloom
@@ -0,0 +1,109 @@
+import hashlib
+import os
+import re
+
+from .bloom import BloomFilter
+from .breach_index import BreachIndex
+from .constants import COMMON_PASSWORDS
+from .metrics import instrumented
+from .rng import DEFAULT_SOURCE
+
+# Environment variables naming a local breach index built with build_breach_index
+# and a breach filter built with build_bloom_filter
+BREACH_INDEX_ENV = "PASSWORD_BREACH_INDEX"
+BREACH_FILTER_ENV = "PASSWORD_BREACH_FILTER"
+
+_default_index = None
+_default_filter = None
+
+
+# Function to set the breach index used when check_password_breach gets none (None to reset)
+def set_breach_index(index):
+    global _default_index
+    if isinstance(index, str):
+        index = BreachIndex(index)
+    _default_index = index
+
+
+# Function to get the configured breach index, opening the one named in the environment on first use
+def get_breach_index():
+    global _default_index
+    if _default_index is None and os.environ.get(BREACH_INDEX_ENV):
+        _default_index = BreachIndex(os.environ[BREACH_INDEX_ENV])
+    return _default_index
+
+
+# Function to set the breach filter used when check_password_breach gets none (None to reset)
+def set_breach_filter(bloom):
+    global _default_filter
+    if isinstance(bloom, str):
+        bloom = BloomFilter.open(bloom)
+    _default_filter = bloom
+
+
+# Function to get the configured breach filter, opening the one named in the environment on first use
+def get_breach_filter():
+    global _default_filter
+    if _default_filter is None and os.environ.get(BREACH_FILTER_ENV):
+        _default_filter = BloomFilter.open(os.environ[BREACH_FILTER_ENV])
+    return _default_filter
+
+
+# Function to get why a password is weak enough to count as breached without looking it up
+# (a common password or an easily cracked pattern), or None when no such rule matches
+def weak_pattern(password):
+    # For demonstration, we'll consider common passwords as "breached"
+    if password.lower() in COMMON_PASSWORDS:
+        return "This password is commonly used and has likely been breached."
+
+    # Check for simple patterns
+    if re.match(r'^[a-z]+$', password) and len(password) < 8:
+        return "Simple lowercase passwords are easily cracked."
+
+    if re.match(r'^[0-9]+$', password):
+        return "Numeric-only passwords are easily cracked."
+
+    if re.match(r'^[a-z]+[0-9]{1,2}$', password):
+        return "Simple word+number patterns are commonly breached."
+    return None
+
+
+# Function to check if a password has been breached.
+# A breach filter answers most misses without touching the index; filter hits are confirmed
+# against the local breach index when there is one. With neither, the check is simulated,
+# drawing from rng (a randomness source) when one is given.
+@instrumented("check_password_breach")
+def check_password_breach(password, index=None, bloom=None, rng=None):
+    reason = weak_pattern(password)
+    if reason:
+        return True, reason
+
+    # Hash the password the same way the HIBP k-anonymity model does
+    password_digest = hashlib.sha1(password.encode()).digest()
+    password_hash = password_digest.hex().upper()
+
+    # A filter miss means the hash is definitely not in the breach list
+    if bloom is None:
+        bloom = get_breach_filter()
+    if bloom is not None and not bloom.might_contain(password_digest):
+        return False, "No breaches found for this password."
+
+    # Confirm in the local breach index if one is configured
+    # An empty index is falsy, so only a missing one falls back to the configured index
+    if index is None:
+        index = get_breach_index()
+    if index is not None:
+        count = index.breach_count(password_digest)
+        if count:
+            seen = f" It has been seen {count:,} times." if index.with_counts else ""
+            return True, f"This password appears in a data breach. Hash prefix: {password_hash[:5]}...{seen}"
+        return False, "No breaches found for this password."
+    if bloom is not None:
+        return True, (f"This password appears in the breach filter. Hash prefix: {password_hash[:5]}... "
+                      "(filters can report false positives)")
+
+    # Without an index or filter, simulate a 5% chance of the password being breached for demonstration
+    if (DEFAULT_SOURCE if rng is None else rng).random() < 0.05:
+        return True, f"This password appears in a data breach. Hash prefix: {password_hash[:5]}..."
+
+    return False, "No breaches found for this password."
@@ -0,0 +1,157 @@
+import hashlib
+import mmap
+import os
+from array import array
+
+# Records are raw 20-byte SHA-1 digests, optionally followed by a 4-byte big-endian
+# breach count, sorted ascending by digest
+DIGEST_SIZE = 20
+COUNT_SIZE = 4
+
+# The prefix-bucket index maps the first BUCKET_BITS bits of a digest to the first
+# record with that prefix. It is stored next to the records as <path>.idx, followed
+# by the record count and the record size.
+BUCKET_BITS = 16
+BUCKET_COUNT = 1 << BUCKET_BITS
+INDEX_SUFFIX = ".idx"
+
+
+# Offline breach checker over a memory-mapped, sorted SHA-1 file.
+# Only the pages touched by a lookup are read; the file is never loaded into RAM.
+# The record size comes from the bucket index, since a file of 24-byte records can also be a
+# whole number of 20-byte ones; a file without one needs with_counts to say which it holds.
+class BreachIndex:
+    def __init__(self, path, with_counts=None):
+        self.path = path
+
+        # Load the bucket index if it was built; it also records whether counts are stored
+        buckets = None
+        index_path = path + INDEX_SUFFIX
+        if os.path.exists(index_path):
+            buckets = array("q")
+            with open(index_path, "rb") as f:
+                buckets.frombytes(f.read())
+            if len(buckets) != BUCKET_COUNT + 2 or buckets[-1] not in (DIGEST_SIZE, DIGEST_SIZE + COUNT_SIZE):
+                raise ValueError(f"{index_path} is not a breach bucket index")
+            stored_counts = buckets.pop() == DIGEST_SIZE + COUNT_SIZE
+            if with_counts is not None and with_counts != stored_counts:
+                raise ValueError(f"{path} was built {'with' if stored_counts else 'without'} breach counts")
+            with_counts = stored_counts
+        elif with_counts is None:
+            raise ValueError(f"{path} has no {INDEX_SUFFIX} bucket index to give its record size; "
+                             f"build it with build_breach_index or pass with_counts")
+
+        self.with_counts = with_counts
+        self.record_size = DIGEST_SIZE + (COUNT_SIZE if with_counts else 0)
+
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size % self.record_size:
+                raise ValueError(f"{path} is not a whole number of {self.record_size}-byte records")
+            self.records = size // self.record_size
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+
+        # Without a built index, bucket starts are found by binary search on first use
+        if buckets is None:
+            buckets = array("q", [-1] * BUCKET_COUNT + [self.records])
+        elif buckets[-1] != self.records:
+            raise ValueError(f"{index_path} does not match {path}")
+        self._buckets = buckets
+
+    def __len__(self):
+        return self.records
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        if isinstance(self._mm, mmap.mmap):
+            self._mm.close()
+
+    def _digest_at(self, position):
+        start = position * self.record_size
+        return self._mm[start:start + DIGEST_SIZE]
+
+    # Binary search for the first record whose digest is >= digest
+    def _lower_bound(self, digest, lo, hi):
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._digest_at(mid) < digest:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _bucket_start(self, bucket):
+        start = self._buckets[bucket]
+        if start < 0:
+            start = self._lower_bound(bucket.to_bytes(BUCKET_BITS // 8, "big"), 0, self.records)
+            self._buckets[bucket] = start
+        return start
+
+    # Function to find the record position of a digest, or -1 if it is not in the file
+    def find(self, digest):
+        bucket = int.from_bytes(digest[:BUCKET_BITS // 8], "big")
+        lo = self._bucket_start(bucket)
+        hi = self._bucket_start(bucket + 1)
+        position = self._lower_bound(digest, lo, hi)
+        if position < hi and self._digest_at(position) == digest:
+            return position
+        return -1
+
+    def contains_digest(self, digest):
+        return self.find(digest) >= 0
+
+    def contains_hash(self, sha1_hex):
+        return self.contains_digest(bytes.fromhex(sha1_hex))
+
+    def contains(self, password):
+        return self.contains_digest(hashlib.sha1(password.encode()).digest())
+
+    # Function to get how often a digest was seen in breaches (0 if absent, 1 if counts were not stored)
+    def breach_count(self, digest):
+        position = self.find(digest)
+        if position < 0:
+            return 0
+        if not self.with_counts:
+            return 1
+        start = position * self.record_size + DIGEST_SIZE
+        return int.from_bytes(self._mm[start:start + COUNT_SIZE], "big")
+
+
+# Function to convert a Pwned Passwords SHA-1 dump ("HASH:COUNT" lines, sorted by hash)
+# into the binary record file plus its bucket index, streaming line by line.
+# Returns the number of records written.
+def build_breach_index(source_path, dest_path, with_counts=False):
+    buckets = array("q", [0] * (BUCKET_COUNT + 1))
+    records = 0
+    previous = b""
+    with open(source_path, "r", encoding="ascii") as source, open(dest_path, "wb") as dest:
+        for line in source:
+            line = line.strip()
+            if not line:
+                continue
+            sha1_hex, _, count = line.partition(":")
+            digest = bytes.fromhex(sha1_hex)
+            if len(digest) != DIGEST_SIZE:
+                raise ValueError(f"Not a SHA-1 hash: {sha1_hex}")
+            if digest <= previous:
+                raise ValueError(f"Hashes must be sorted and unique, found {sha1_hex} after {previous.hex().upper()}")
+            previous = digest
+
+            dest.write(digest)
+            if with_counts:
+                dest.write(min(int(count or 1), 0xFFFFFFFF).to_bytes(COUNT_SIZE, "big"))
+            buckets[int.from_bytes(digest[:BUCKET_BITS // 8], "big") + 1] += 1
+            records += 1
+
+    # Turn per-bucket counts into the first record position of every bucket
+    for bucket in range(1, BUCKET_COUNT + 1):
+        buckets[bucket] += buckets[bucket - 1]
+    buckets.append(DIGEST_SIZE + (COUNT_SIZE if with_counts else 0))
+    with open(dest_path + INDEX_SUFFIX, "wb") as f:
+        buckets.tofile(f)
+    return records
@@ -0,0 +1,203 @@
+import argparse
+import asyncio
+import json
+import sys
+
+from .audit import AUDIT_FORMATS, DEFAULT_AUDIT_CHUNK, run_audit
+from .bloom import DEFAULT_FP_RATE, build_bloom_filter
+from .breach_index import build_breach_index
+from .constants import GENERATION_MODES
+from .export import DEFAULT_CHUNK_SIZE, EXPORT_FORMATS, write_export
+from .fingerprint import FingerprintIndex
+from .markov import pronounceable_length
+from .rng import RNG_SOURCES, make_source
+from .service import DEFAULT_HOST, DEFAULT_PORT, serve
+from .wordlist import build_wordlist
+
+# Options each mode starts from, as in the UI; --options overrides them key by key.
+# Pronounceable passwords default to pronounceable_length(), which needs the trained model.
+DEFAULT_OPTIONS = {
+    "Random": {'length': 16},
+    "Pronounceable": {},
+    "PIN": {'length': 6},
+    "Passphrase": {'word_count': 4},
+    "Custom Pattern": {'pattern': "aaaA-999#"},
+}
+
+
+# Function to get the default options of a mode
+def _default_options(mode):
+    if mode == "Pronounceable":
+        return {'length': pronounceable_length()}
+    return dict(DEFAULT_OPTIONS[mode])
+
+
+# Function to parse --options, which must be a JSON object
+def _json_options(text):
+    try:
+        options = json.loads(text)
+    except json.JSONDecodeError as e:
+        raise argparse.ArgumentTypeError(f"not valid JSON: {e}")
+    if not isinstance(options, dict):
+        raise argparse.ArgumentTypeError("must be a JSON object, e.g. '{\"length\": 16}'")
+    return options
+
+
+# Function to run the generate command: stream passwords to a file or stdout
+def _generate(args):
+    options = {**_default_options(args.mode), **args.options}
+    if args.workers == 0:
+        args.workers = None
+    if args.seed is not None and args.rng is None:
+        args.rng = "seeded"
+    rng = make_source(args.rng, args.seed) if args.rng else None
+    seen = FingerprintIndex(args.namespace) if args.namespace else None
+    try:
+        if args.output == "-":
+            write_export(sys.stdout, args.mode, options, args.count, args.format, args.strength, args.breach,
+                         args.chunk_size, args.workers, args.entropy, args.unique, seen, rng)
+        else:
+            with open(args.output, "w", encoding="utf-8", newline="") as out:
+                write_export(out, args.mode, options, args.count, args.format, args.strength, args.breach,
+                             args.chunk_size, args.workers, args.entropy, args.unique, seen, rng)
+    finally:
+        # Passwords already written stay recorded even if the run fails part way
+        if seen is not None:
+            seen.flush()
+            print(f"Namespace {args.namespace} holds {len(seen):,} passwords", file=sys.stderr)
+            seen.close()
+    return 0
+
+
+# Function to run the build-breach-index command: convert a sorted SHA-1 dump to the binary index
+def _build_breach_index(args):
+    records = build_breach_index(args.source, args.output, args.counts)
+    print(f"Wrote {records:,} records to {args.output}", file=sys.stderr)
+    return 0
+
+
+# Function to run the build-breach-filter command: build a Bloom filter from a hash list
+def _build_breach_filter(args):
+    count, bloom = build_bloom_filter(args.source, args.output, args.fp_rate, args.expected, args.from_index)
+    print(f"Added {count:,} hashes to {args.output} "
+          f"({bloom.num_bits // 8:,} bytes, {bloom.num_hashes} hashes per item)", file=sys.stderr)
+    return 0
+
+
+# Function to run the build-wordlist command: convert a text word list to the indexed format
+def _build_wordlist(args):
+    count = build_wordlist(args.source, args.output)
+    print(f"Wrote {count:,} words to {args.output}", file=sys.stderr)
+    return 0
+
+
+# Function to run the serve command: start the HTTP/JSON service until interrupted
+def _serve(args):
+    print(f"Serving on http://{args.host}:{args.port}", file=sys.stderr)
+    try:
+        asyncio.run(serve(args.host, args.port, args.workers or None, pooled=args.pool))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+# Function to run the audit command: score and breach-check a credential file, then print the report
+def _audit(args):
+    if args.workers == 0:
+        args.workers = None
+    if args.output is None:
+        report = run_audit(args.source, None, args.input_format, args.breach, args.format, args.passwords,
+                           args.workers, args.chunk_size, args.index, args.filter)
+    elif args.output == "-":
+        report = run_audit(args.source, sys.stdout, args.input_format, args.breach, args.format, args.passwords,
+                           args.workers, args.chunk_size, args.index, args.filter)
+    else:
+        with open(args.output, "w", encoding="utf-8", newline="") as out:
+            report = run_audit(args.source, out, args.input_format, args.breach, args.format, args.passwords,
+                               args.workers, args.chunk_size, args.index, args.filter)
+    print(json.dumps(report, indent=2), file=sys.stderr if args.output == "-" else sys.stdout)
+    return 0
+
+
+# Function to build the command-line parser
+def build_parser():
+    parser = argparse.ArgumentParser(prog="password_generator", description="Headless password generator")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    generate = commands.add_parser("generate", help="Generate passwords and stream them to a file or stdout")
+    generate.add_argument("--mode", choices=GENERATION_MODES, default="Random")
+    generate.add_argument("--options", type=_json_options, default="{}",
+                          help='Mode options as JSON, e.g. \'{"length": 16}\', over the mode\'s defaults')
+    generate.add_argument("-n", "--count", type=int, default=1)
+    generate.add_argument("--format", choices=EXPORT_FORMATS, default="txt")
+    generate.add_argument("-o", "--output", default="-", help="Output file, or - for stdout")
+    generate.add_argument("--strength", action="store_true", help="Add strength score and category columns")
+    generate.add_argument("--breach", action="store_true", help="Add a breach check column")
+    generate.add_argument("--entropy", action="store_true", help="Add an estimated entropy column")
+    generate.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    generate.add_argument("--workers", type=int, default=1,
+                          help="Worker processes for sharded generation, 0 for one per core")
+    generate.add_argument("--rng", choices=RNG_SOURCES,
+                          help="Randomness source; seeded runs are reproducible and only for testing")
+    generate.add_argument("--seed", type=int, help="Seed for --rng seeded (default 0)")
+    generate.add_argument("--unique", action="store_true", help="Never repeat a password within the run")
+    generate.add_argument("--namespace",
+                          help="Fingerprint file of passwords issued by earlier runs; implies --unique and "
+                               "records this run's passwords")
+    generate.set_defaults(func=_generate)
+
+    breach_index = commands.add_parser("build-breach-index",
+                                       help="Convert a sorted Pwned Passwords SHA-1 dump into a local breach index")
+    breach_index.add_argument("source", help='Text file of sorted "HASH:COUNT" lines')
+    breach_index.add_argument("output", help="Binary index file to write")
+    breach_index.add_argument("--counts", action="store_true", help="Store breach counts with each hash")
+    breach_index.set_defaults(func=_build_breach_index)
+
+    breach_filter = commands.add_parser("build-breach-filter",
+                                        help="Build a memory-mappable Bloom filter in front of the breach index")
+    breach_filter.add_argument("source", help='Text file of "HASH" or "HASH:COUNT" lines, or a breach index')
+    breach_filter.add_argument("output", help="Filter file to write")
+    breach_filter.add_argument("--fp-rate", type=float, default=DEFAULT_FP_RATE, help="Target false-positive rate")
+    breach_filter.add_argument("--expected", type=int, help="Expected number of hashes (default: count the source)")
+    breach_filter.add_argument("--from-index", action="store_true", help="Read hashes from a breach index file")
+    breach_filter.set_defaults(func=_build_breach_filter)
+
+    wordlist = commands.add_parser("build-wordlist",
+                                   help="Convert a text word list (plain, Diceware or EFF) into the indexed format")
+    wordlist.add_argument("source", help="Text file with one word per line")
+    wordlist.add_argument("output", help="Word list file to write")
+    wordlist.set_defaults(func=_build_wordlist)
+
+    audit = commands.add_parser("audit", help="Score and breach-check an existing credential file")
+    audit.add_argument("source", help="Text file with one password or SHA-1 hash per line")
+    audit.add_argument("--input-format", choices=AUDIT_FORMATS, default="plain",
+                       help='Plaintext passwords, or SHA-1 hashes ("HASH" or "HASH:COUNT" lines)')
+    audit.add_argument("--breach", action="store_true", help="Check every entry against the breach index or filter")
+    audit.add_argument("--index", help="Breach index file (default: PASSWORD_BREACH_INDEX)")
+    audit.add_argument("--filter", help="Breach filter file (default: PASSWORD_BREACH_FILTER)")
+    audit.add_argument("-o", "--output", help="Write per-entry results to this file, or - for stdout")
+    audit.add_argument("--format", choices=EXPORT_FORMATS, default="csv", help="Format of the per-entry results")
+    audit.add_argument("--passwords", action="store_true", help="Include plaintext passwords in the results")
+    audit.add_argument("--chunk-size", type=int, default=DEFAULT_AUDIT_CHUNK, help="Bytes of input per worker task")
+    audit.add_argument("--workers", type=int, default=0, help="Worker processes, 0 for one per core")
+    audit.set_defaults(func=_audit)
+
+    service = commands.add_parser("serve", help="Run the asynchronous HTTP/JSON generation service")
+    service.add_argument("--host", default=DEFAULT_HOST)
+    service.add_argument("--port", type=int, default=DEFAULT_PORT)
+    service.add_argument("--workers", type=int, default=0,
+                         help="Worker processes for large batches, 0 for one per core")
+    service.add_argument("--pool", action="store_true",
+                         help="Serve small requests from pre-generated pools refilled in the background")
+    service.set_defaults(func=_serve)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        return args.func(args)
+    except (ValueError, TypeError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
@@ -0,0 +1,96 @@
+import string
+
+# Define character sets
+LOWERCASE = string.ascii_lowercase
+UPPERCASE = string.ascii_uppercase
+DIGITS = string.digits
+SPECIAL_CHARS = "!@#$%^&*()_+-=[]{}|;:,.<>?/~"
+SIMILAR_CHARS = "il1Lo0O"
+AMBIGUOUS_CHARS = "{}[]()/\\'\"`~,;:.<>"
+VOWELS = "aeiou"
+CONSONANTS = "".join([c for c in LOWERCASE if c not in VOWELS])
+
+# Generation modes, in the order the UI offers them
+GENERATION_MODES = ["Random", "Pronounceable", "PIN", "Passphrase", "Custom Pattern"]
+
+# Common English words for passphrase generation
+COMMON_WORDS = [
+    "time", "year", "people", "way", "day", "man", "thing", "woman", "life", "child",
+    "world", "school", "state", "family", "student", "group", "country", "problem", "hand", "part",
+    "place", "case", "week", "company", "system", "program", "question", "work", "government", "number",
+    "night", "point", "home", "water", "room", "mother", "area", "money", "story", "fact",
+    "month", "lot", "right", "study", "book", "eye", "job", "word", "business", "issue",
+    "side", "kind", "head", "house", "service", "friend", "father", "power", "hour", "game",
+    "line", "end", "member", "law", "car", "city", "community", "name", "president", "team",
+    "minute", "idea", "kid", "body", "information", "back", "parent", "face", "others", "level",
+    "office", "door", "health", "person", "art", "war", "history", "party", "result", "change",
+    "morning", "reason", "research", "girl", "guy", "moment", "air", "teacher", "force", "education"
+]
+
+# Commonly used passwords, most common first
+COMMON_PASSWORDS = [
+    "password", "123456", "qwerty", "admin", "welcome",
+    "password123", "abc123", "letmein", "monkey", "1234567890"
+]
+
+# Everyday English words the built-in pronounceable model is trained on, in addition to
+# COMMON_WORDS. A few hundred words give the model enough letter contexts to sound natural.
+PRONOUNCEABLE_WORDS = COMMON_WORDS + [
+    "able", "about", "above", "across", "action", "active", "actor", "address", "admit", "adult",
+    "affect", "after", "again", "against", "agency", "agent", "agree", "ahead", "allow", "almost",
+    "alone", "along", "already", "among", "amount", "animal", "answer", "anyone", "appear", "apply",
+    "around", "arrive", "artist", "attack", "author", "avoid", "away", "baby", "bank", "base",
+    "beat", "beautiful", "become", "before", "begin", "behind", "believe", "better", "between", "beyond",
+    "bill", "black", "blood", "blue", "board", "born", "bottom", "brother", "budget", "build",
+    "building", "call", "camera", "campaign", "cancer", "capital", "card", "care", "career", "carry",
+    "cause", "center", "central", "century", "certain", "chair", "chance", "character", "charge", "choice",
+    "church", "citizen", "civil", "claim", "class", "clear", "close", "coach", "cold", "collection",
+    "college", "color", "common", "concern", "condition", "consider", "contain", "control", "corner", "cost",
+    "couple", "course", "court", "cover", "create", "crime", "culture", "cup", "current", "dark",
+    "daughter", "dead", "deal", "decade", "decide", "deep", "defense", "degree", "design", "detail",
+    "develop", "dinner", "direction", "doctor", "dream", "drive", "during", "early", "east", "easy",
+    "economy", "effect", "effort", "eight", "either", "election", "else", "energy", "enjoy", "enough",
+    "enter", "even", "evening", "event", "ever", "every", "evidence", "exactly", "example", "expect",
+    "expert", "explain", "factor", "fall", "famous", "federal", "feel", "feeling", "field", "fight",
+    "figure", "film", "final", "finally", "finger", "finish", "fire", "firm", "first", "fish",
+    "five", "floor", "focus", "follow", "food", "foot", "foreign", "forget", "form", "forward",
+    "four", "free", "front", "full", "future", "garden", "general", "give", "glass", "goal",
+    "good", "great", "green", "ground", "grow", "growth", "guess", "hair", "half", "happen",
+    "happy", "hard", "heart", "heat", "heavy", "help", "here", "herself", "high", "himself",
+    "hold", "hope", "hospital", "hotel", "however", "huge", "human", "hundred", "husband", "image",
+    "imagine", "impact", "important", "improve", "include", "increase", "indeed", "inside", "instead", "interest",
+    "into", "item", "itself", "join", "just", "keep", "kill", "kitchen", "know", "land",
+    "language", "large", "last", "late", "later", "laugh", "lawyer", "lead", "leader", "learn",
+    "least", "leave", "left", "legal", "less", "letter", "light", "like", "likely", "list",
+    "listen", "little", "live", "local", "long", "look", "lose", "love", "machine", "magazine",
+    "main", "maintain", "major", "make", "manage", "market", "marriage", "matter", "maybe", "measure",
+    "media", "medical", "meeting", "memory", "mention", "method", "middle", "might", "military", "million",
+    "mind", "miss", "mission", "model", "modern", "more", "most", "move", "movie", "much",
+    "music", "must", "myself", "nation", "national", "natural", "nature", "near", "nearly", "need",
+    "never", "news", "next", "nice", "none", "north", "note", "nothing", "notice", "novel",
+    "occur", "offer", "officer", "often", "once", "only", "open", "operation", "option", "order",
+    "other", "outside", "over", "owner", "page", "pain", "painting", "paper", "pass", "past",
+    "patient", "pattern", "peace", "perform", "perhaps", "period", "phone", "picture", "piece", "plan",
+    "plant", "play", "player", "police", "policy", "popular", "position", "positive", "possible", "pressure",
+    "pretty", "prevent", "price", "private", "probably", "process", "produce", "product", "protect", "prove",
+    "provide", "public", "purpose", "quality", "quickly", "quite", "radio", "raise", "range", "rather",
+    "reach", "read", "ready", "real", "reality", "realize", "really", "receive", "recent", "record",
+    "reduce", "reflect", "region", "relate", "remain", "remember", "remove", "report", "require", "resource",
+    "respond", "rest", "return", "reveal", "rich", "rise", "risk", "road", "rock", "role",
+    "rule", "safe", "same", "save", "scene", "science", "season", "seat", "second", "section",
+    "security", "seek", "seem", "sell", "send", "senior", "sense", "series", "serious", "serve",
+    "seven", "several", "shake", "share", "shoot", "short", "shoulder", "show", "simple", "simply",
+    "since", "sing", "single", "sister", "site", "size", "skill", "skin", "small", "smile",
+    "social", "society", "soldier", "some", "someone", "song", "soon", "sort", "sound", "source",
+    "south", "space", "speak", "special", "speech", "spend", "sport", "spring", "staff", "stage",
+    "stand", "standard", "star", "start", "station", "stay", "step", "still", "stock", "stop",
+    "store", "strategy", "street", "strong", "structure", "stuff", "style", "subject", "success", "suddenly",
+    "suffer", "summer", "support", "sure", "surface", "table", "take", "talk", "task", "teach",
+    "television", "tell", "tend", "term", "test", "thank", "theory", "think", "third", "thought",
+    "thousand", "threat", "three", "through", "today", "together", "tonight", "total", "tough", "toward",
+    "town", "trade", "travel", "treat", "tree", "trial", "trip", "trouble", "true", "truth",
+    "turn", "under", "until", "upon", "value", "various", "very", "victim", "view", "visit",
+    "voice", "vote", "wait", "walk", "wall", "want", "watch", "weapon", "wear", "west",
+    "whatever", "white", "whole", "wife", "window", "wish", "within", "without", "wonder", "worker",
+    "writer", "wrong", "yard", "yellow", "young", "yourself",
+]
@@ -0,0 +1,43 @@
+import gzip
+import io
+import threading
+from datetime import datetime
+
+# MIME type of an export payload, by whether it is gzip-compressed
+EXPORT_MIME_TYPES = {False: "text/plain", True: "application/gzip"}
+
+
+# Function to encode text chunks as one download payload, optionally gzip-compressed.
+# The gzip header carries no timestamp, so the same passwords always give the same bytes.
+def encode_export(chunks, compress=False):
+    if not compress:
+        return "".join(chunks).encode("utf-8")
+    buffer = io.BytesIO()
+    with gzip.GzipFile(fileobj=buffer, mode="wb", mtime=0) as f:
+        for chunk in chunks:
+            f.write(chunk.encode("utf-8"))
+    return buffer.getvalue()
+
+
+# Function to name an export file after a prefix and when it was created (default now)
+def export_filename(prefix, compress=False, created=None):
+    name = f"{prefix}_{(created or datetime.now()).strftime('%Y%m%d_%H%M%S')}.txt"
+    return name + ".gz" if compress else name
+
+
+# A download whose payload is only encoded when it is first requested, then kept for reuse.
+# source is the text itself, or a callable returning text chunks. payload() may be called
+# from another thread, as Streamlit does for a download button's data callable.
+class LazyExport:
+    def __init__(self, source):
+        self._source = source
+        self._payloads = {}
+        self._lock = threading.Lock()
+
+    # Function to get the encoded payload, building it on the first call for each compression
+    def payload(self, compress=False):
+        with self._lock:
+            if compress not in self._payloads:
+                chunks = [self._source] if isinstance(self._source, str) else self._source()
+                self._payloads[compress] = encode_export(chunks, compress)
+            return self._payloads[compress]
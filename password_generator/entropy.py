@@ -0,0 +1,483 @@
+import math
+import re
+import time
+from bisect import bisect_right
+from collections import namedtuple
+from functools import lru_cache
+from itertools import compress
+from operator import itemgetter, sub
+
+from .constants import COMMON_PASSWORDS, COMMON_WORDS
+from .metrics import instrumented
+from .strength import ALNUM_SET, DIGIT_SET, LOWER_SET, UPPER_SET
+
+# Result of estimate_entropy: bits of entropy, estimated guesses, and the matches
+# (pattern, token, guesses) that make up the cheapest way to guess the password
+EntropyEstimate = namedtuple("EntropyEstimate", ["bits", "guesses", "matches"])
+
+# Guess counts are floored so a single recognised token never counts as free
+MIN_MATCH_GUESSES = 10
+MIN_MATCH_LENGTH = 3
+
+REFERENCE_YEAR = time.localtime().tm_year
+MIN_YEAR_SPACE = 20
+
+# Common character substitutions undone before dictionary lookups
+L33T_TABLE = str.maketrans({'4': 'a', '@': 'a', '3': 'e', '1': 'i', '!': 'i', '0': 'o',
+                            '$': 's', '5': 's', '7': 't', '+': 't', '8': 'b', '9': 'g'})
+L33T_RE = re.compile("[" + re.escape("".join(map(chr, L33T_TABLE))) + "]")
+
+# QWERTY rows, unshifted and shifted. Every row after the first sits half a key to the
+# right, so each key touches two keys in the rows above and below it.
+KEYBOARD_ROWS = [
+    ("`1234567890-=", "~!@#$%^&*()_+"),
+    ("qwertyuiop[]\\", "QWERTYUIOP{}|"),
+    ("asdfghjkl;'", 'ASDFGHJKL:"'),
+    ("zxcvbnm,./", "ZXCVBNM<>?"),
+]
+KEYBOARD_DIRECTIONS = [(-1, 0), (0, -1), (1, -1), (1, 0), (0, 1), (-1, 1)]
+# Every ASCII run of MIN_MATCH_LENGTH characters whose codes step by the same 1 to 5 up or
+# down, the least a sequence takes; other passwords are checked code by code
+SEQUENCE_TRIGRAMS = frozenset(chr(c) + chr(c + d) + chr(c + 2 * d)
+                              for d in range(-5, 6) if d for c in range(128) if 0 <= c + 2 * d < 128)
+
+YEAR_RE = re.compile(r'19\d\d|20\d\d')
+DIGIT_RUN_RE = re.compile(r'\d{4,8}')
+SEPARATED_DATE_RE = re.compile(r'(\d{1,4})([\s/\\_.-])(\d{1,2})\2(\d{1,4})')
+REPEAT_RE = re.compile(r'(.+?)\1+')
+# A run of three or a repeated pair; any longer repeated unit repeats a MIN_MATCH_LENGTH window
+SHORT_REPEAT_RE = re.compile(r'(.)\1\1|(..)\2')
+# Three digits in a row, or two around a separator: the least any date reading needs
+DATE_HINT_RE = re.compile(r'\d(?:\d\d|[\s/\\_.-]\d)')
+
+# End position of a (start, end, pattern, guesses) match
+_END = itemgetter(1)
+
+# Named word lists used for dictionary matches, each ordered most common first
+_dictionaries = {
+    "passwords": COMMON_PASSWORDS,
+    "english": COMMON_WORDS,
+}
+
+
+# Function to add (or replace) a ranked word list used for dictionary matches
+def add_dictionary(name, words):
+    _dictionaries[name] = [word.strip().lower() for word in words if word.strip()]
+    _dictionary_index.cache_clear()
+
+
+# Function to load a ranked word list from a text file with one word per line
+def load_dictionary(name, path):
+    with open(path, "r", encoding="utf-8") as f:
+        add_dictionary(name, f)
+
+
+# Function to build the dictionary index once: the best rank of every word, for every word
+# prefix of MIN_MATCH_LENGTH characters the lengths of the words starting with it (so a start
+# position costs one lookup and each candidate word one more), the longest word length and
+# the characters that appear in words
+@lru_cache(maxsize=None)
+def _dictionary_index():
+    ranks = {}
+    lengths = {}
+    for words in _dictionaries.values():
+        for rank, word in enumerate(words, 1):
+            if len(word) < MIN_MATCH_LENGTH:
+                continue
+            ranks[word] = min(rank, ranks.get(word, rank))
+            lengths.setdefault(word[:MIN_MATCH_LENGTH], set()).add(len(word))
+    return (ranks, {prefix: tuple(sorted(sizes)) for prefix, sizes in lengths.items()}, max(map(len, ranks), default=0),
+            frozenset("".join(ranks)))
+
+
+# Function to build the keyboard adjacency graph once.
+# Returns the direction between every two adjacent keys (shifted or not) keyed by the pair of
+# characters, plus whether each key is shifted, the number of keys and their average number
+# of neighbours.
+@lru_cache(maxsize=None)
+def _keyboard_graph():
+    positions = {}
+    for y, (row, shifted) in enumerate(KEYBOARD_ROWS):
+        offset = 1 if y else 0
+        for x, (plain, shift) in enumerate(zip(row, shifted)):
+            positions[(x + offset, y)] = (plain, shift)
+
+    pairs = {}
+    is_shifted = {}
+    degrees = []
+    for (x, y), (plain, shift) in positions.items():
+        neighbours = {}
+        for direction, (dx, dy) in enumerate(KEYBOARD_DIRECTIONS):
+            neighbour = positions.get((x + dx, y + dy))
+            if neighbour:
+                neighbours[neighbour[0]] = direction
+                neighbours[neighbour[1]] = direction
+        for neighbour, direction in neighbours.items():
+            pairs[plain + neighbour] = pairs[shift + neighbour] = direction
+        is_shifted[plain] = False
+        is_shifted[shift] = True
+        degrees.append(len(neighbours) // 2)
+    return pairs, is_shifted, len(positions), sum(degrees) / len(degrees)
+
+
+# Function to build, once, every run of MIN_MATCH_LENGTH characters that is a keyboard walk:
+# two steps in a row between adjacent keys
+@lru_cache(maxsize=None)
+def _keyboard_trigrams():
+    pairs = _keyboard_graph()[0]
+    following = {}
+    for pair in pairs:
+        following.setdefault(pair[0], []).append(pair[1])
+    return frozenset(pair + third for pair in pairs for third in following.get(pair[1], ()))
+
+
+# Function to count the case variations an attacker must try for a dictionary word
+def _uppercase_variations(token):
+    if token.islower() or not any(c.isalpha() for c in token):
+        return 1
+    if token.isupper() or (token[0].isupper() and token[1:].islower()) or (token[:-1].islower() and token[-1].isupper()):
+        return 2
+    upper = sum(1 for c in token if c.isupper())
+    lower = sum(1 for c in token if c.islower())
+    return sum(math.comb(upper + lower, i) for i in range(1, min(upper, lower) + 1))
+
+
+# Function to get the slices of every MIN_MATCH_LENGTH-character window in a string of a
+# given length, so all of a password's windows can be cut and looked up in C
+@lru_cache(maxsize=None)
+def _window_slices(length):
+    return [slice(i, i + MIN_MATCH_LENGTH) for i in range(length - MIN_MATCH_LENGTH + 1)]
+
+
+def _dictionary_matches(password, windows):
+    ranks, prefixes, longest, alphabet = _dictionary_index()
+    lowered = password.lower()
+    length = len(password)
+    if len(lowered) != length:
+        # A few characters (such as a dotted capital I) lower to two; keep those as they are
+        lowered = "".join(c.lower() if len(c.lower()) == 1 else c for c in password)
+    slices = _window_slices(length)
+    if lowered != password:
+        windows = list(map(lowered.__getitem__, slices))
+    matches = []
+    # Word lengths starting at each position, or None where no word starts with its window
+    starts = list(map(prefixes.get, windows))
+    for i in compress(range(len(starts)), starts):
+        for size in starts[i]:
+            j = i + size
+            if j > length:
+                break
+            rank = ranks.get(lowered[i:j])
+            if rank:
+                matches.append((i, j, "dictionary", rank * _uppercase_variations(password[i:j])))
+
+    # The l33t pass only adds words that cover a substituted character, so it skips starts
+    # after the last one, and before the first one by more than the longest word or across a
+    # character no word has (such as all but the number at the end of a passphrase)
+    substituted = [match.start() for match in L33T_RE.finditer(lowered)]
+    if not substituted:
+        return matches
+    first = substituted[0]
+    while first > 0 and substituted[0] - first < longest - 1 and lowered[first - 1] in alphabet:
+        first -= 1
+    l33t_slices = slices[first:substituted[-1] + 1]
+    if not l33t_slices:
+        return matches
+    unleeted = lowered.translate(L33T_TABLE)
+    starts = list(map(prefixes.get, map(unleeted.__getitem__, l33t_slices)))
+    following = 0
+    for i in compress(range(first, first + len(starts)), starts):
+        while substituted[following] < i:
+            following += 1
+        if substituted[following] >= i + longest:
+            continue
+        for size in starts[i - first]:
+            j = i + size
+            if j > length:
+                break
+            if j <= substituted[following]:
+                continue
+            rank = ranks.get(unleeted[i:j])
+            if rank:
+                substitutions = sum(1 for a, b in zip(lowered[i:j], unleeted[i:j]) if a != b)
+                matches.append((i, j, "dictionary", rank * _uppercase_variations(password[i:j]) * 2 ** substitutions))
+    return matches
+
+
+def _keyboard_matches(password, windows):
+    matches = []
+    trigrams = _keyboard_trigrams()
+    if trigrams.isdisjoint(windows):
+        return matches
+    pairs, is_shifted, starts, degree = _keyboard_graph()
+    count = len(password) - 1
+    end = 0
+    # A walk of MIN_MATCH_LENGTH or more keys starts at the first trigram window after the last one
+    for i in compress(range(len(windows)), map(trigrams.__contains__, windows)):
+        if i < end:
+            continue
+        j = i
+        turns = 0
+        direction = None
+        while j < count:
+            step = pairs.get(password[j:j + 2])
+            if step is None:
+                break
+            if step != direction:
+                turns += 1
+                direction = step
+            j += 1
+        end = j
+        length = j + 1 - i
+        guesses = 0
+        for k in range(2, length + 1):
+            for t in range(1, min(turns, k - 1) + 1):
+                guesses += math.comb(k - 1, t - 1) * starts * degree ** t
+        shifted = sum(1 for c in password[i:j + 1] if is_shifted[c])
+        if shifted == length:
+            guesses *= 2
+        elif shifted:
+            unshifted = length - shifted
+            guesses *= sum(math.comb(length, k) for k in range(1, min(shifted, unshifted) + 1))
+        matches.append((i, j + 1, "keyboard", round(guesses)))
+    return matches
+
+
+def _sequence_matches(password, windows):
+    matches = []
+    if password.isascii() and SEQUENCE_TRIGRAMS.isdisjoint(windows):
+        return matches
+    codes = list(map(ord, password))
+    deltas = list(map(sub, codes[1:], codes))
+    count = len(deltas)
+    i = 0
+    while i < count:
+        delta = deltas[i]
+        j = i + 1
+        while j < count and deltas[j] == delta:
+            j += 1
+        length = j + 1 - i
+        if length >= MIN_MATCH_LENGTH and 0 < abs(delta) <= 5:
+            first = password[i]
+            if first in "aAzZ019":
+                base = 4
+            elif first.isdigit():
+                base = 10
+            else:
+                base = 26
+            if delta < 0:
+                base *= 2
+            matches.append((i, j + 1, "sequence", base * length))
+        i = j
+    return matches
+
+
+# Function to check whether any unit of MIN_MATCH_LENGTH or more characters is followed by itself
+def _has_repeated_unit(password, windows):
+    if len(set(windows)) == len(windows):
+        return False
+    seen = {}
+    for k, window in enumerate(windows):
+        for i in seen.get(window, ()):
+            if password.startswith(password[i:k], k):
+                return True
+        seen.setdefault(window, []).append(k)
+    return False
+
+
+def _repeat_matches(password, windows):
+    matches = []
+    # A repeat of at least three characters is a run of three, a repeated pair, or a unit of
+    # MIN_MATCH_LENGTH or more followed by itself, whose first window appears again that many
+    # characters on; most passwords have none of these
+    if not SHORT_REPEAT_RE.search(password) and not _has_repeated_unit(password, windows):
+        return matches
+    for match in REPEAT_RE.finditer(password):
+        if match.end() - match.start() < MIN_MATCH_LENGTH:
+            continue
+        unit = match.group(1)
+        count = (match.end() - match.start()) // len(unit)
+        matches.append((match.start(), match.end(), "repeat", _estimate(unit).guesses * count))
+    return matches
+
+
+def _year_guesses(year):
+    if year < 100:
+        year += 1900 if year > REFERENCE_YEAR % 100 else 2000
+    return max(abs(REFERENCE_YEAR - year), MIN_YEAR_SPACE)
+
+
+# Function to check whether day, month and year strings (day and month in either order) form a date
+def _date_guesses(first, second, year):
+    first, second, year = int(first), int(second), int(year)
+    if (1 <= first <= 31 and 1 <= second <= 12) or (1 <= second <= 31 and 1 <= first <= 12):
+        if year < 100 or 1000 <= year <= 2050:
+            return 365 * _year_guesses(year)
+    return None
+
+
+# Function to build, once, every day and month written as 2 to 4 digits (either way round,
+# cut after the first one or two digits), so a run of digits is read as a date with one lookup
+@lru_cache(maxsize=None)
+def _day_month_strings():
+    strings = set()
+    for rest in range(2, 5):
+        for number in range(10 ** rest):
+            day_month = f"{number:0{rest}d}"
+            for cut in range(max(1, rest - 2), min(2, rest - 1) + 1):
+                first, second = int(day_month[:cut]), int(day_month[cut:])
+                if (1 <= first <= 31 and 1 <= second <= 12) or (1 <= second <= 31 and 1 <= first <= 12):
+                    strings.add(day_month)
+    return frozenset(strings)
+
+
+# Function to build, once, the guesses for a date with each 2-digit year
+@lru_cache(maxsize=None)
+def _short_year_date_guesses():
+    return {f"{year:02d}": 365 * _year_guesses(year) for year in range(100)}
+
+
+# Function to get the guesses for a date with any other year, or None if it is out of range
+def _other_date_guesses(year):
+    return 365 * _year_guesses(year) if year < 100 or 1000 <= year <= 2050 else None
+
+
+# Function to get, once per length, every date reading of a run of digits: for each span of
+# 4 to 8 digits (start, end, and slices of the run for the year and for the day and month),
+# with a 2 or 4 digit year first or last and 2 to 4 digits of day and month
+@lru_cache(maxsize=None)
+def _digit_date_shapes(length):
+    spans = []
+    for i in range(length - 3):
+        for j in range(i + 4, min(i + 8, length) + 1):
+            shapes = []
+            for year_length in (2, 4):
+                rest = j - i - year_length
+                if 2 <= rest <= 4:
+                    shapes.append((slice(i + rest, j), slice(i, i + rest)))
+                    shapes.append((slice(i, i + year_length), slice(i + year_length, j)))
+            spans.append((i, j, shapes))
+    return spans
+
+
+def _date_matches(password, windows):
+    matches = []
+    if not DATE_HINT_RE.search(password):
+        return matches
+    for match in YEAR_RE.finditer(password):
+        matches.append((match.start(), match.end(), "date", _year_guesses(int(match.group()))))
+    for match in SEPARATED_DATE_RE.finditer(password):
+        first, second, third = match.group(1), match.group(3), match.group(4)
+        guesses = None
+        if len(third) in (2, 4) and len(first) <= 2:
+            guesses = _date_guesses(first, second, third)
+        elif len(first) in (2, 4) and len(third) <= 2:
+            guesses = _date_guesses(second, third, first)
+        if guesses:
+            matches.append((match.start(), match.end(), "date", guesses * 4))
+    # Every span of a digit run is read as a date every way it can be, keeping the cheapest
+    day_months = _day_month_strings()
+    short_years = _short_year_date_guesses()
+    for run in DIGIT_RUN_RE.finditer(password):
+        digits = run.group()
+        if not digits.isascii():
+            # Digits from other scripts read as the same numbers
+            digits = "".join(str(int(digit)) for digit in digits)
+        offset = run.start()
+        for i, j, shapes in _digit_date_shapes(len(digits)):
+            best = None
+            for year_slice, day_month_slice in shapes:
+                if digits[day_month_slice] in day_months:
+                    year = digits[year_slice]
+                    guesses = short_years[year] if len(year) == 2 else _other_date_guesses(int(year))
+                    if guesses and (best is None or guesses < best):
+                        best = guesses
+            if best:
+                matches.append((offset + i, offset + j, "date", best))
+    return matches
+
+
+# Function to get the brute-force cardinality of the character classes in a password
+def _cardinality(password):
+    chars = set(password)
+    cardinality = 0
+    if not chars.isdisjoint(LOWER_SET):
+        cardinality += 26
+    if not chars.isdisjoint(UPPER_SET):
+        cardinality += 26
+    if not chars.isdisjoint(DIGIT_SET):
+        cardinality += 10
+    if not chars <= ALNUM_SET:
+        cardinality += 33
+    return max(cardinality, 10)
+
+
+def _estimate(password):
+    length = len(password)
+    if not length:
+        return EntropyEstimate(0.0, 1, [])
+
+    # Every MIN_MATCH_LENGTH-character window, which the finders check before anything slower
+    windows = list(map(password.__getitem__, _window_slices(length)))
+    found = []
+    for finder in (_dictionary_matches, _keyboard_matches, _sequence_matches, _repeat_matches, _date_matches):
+        found += finder(password, windows)
+
+    cardinality = _cardinality(password)
+    if not found:
+        guesses = cardinality ** length
+        return EntropyEstimate(math.log2(guesses), guesses, [("bruteforce", password, guesses)])
+
+    # Cheapest segmentation: every character is either brute-forced or part of a match.
+    # Matches are taken in order of their end. costs[i] is the fewest guesses for the text up
+    # to ends[i], and links[i] the match ending there with the entry its start continues
+    # from, or None where the characters since ends[i - 1] are brute-forced. A start costs
+    # one binary search for the last end at or before it, brute-forcing the rest.
+    found.sort(key=_END)
+    ends = [0]
+    costs = [1]
+    links = [None]
+    for match in found:
+        start, end, _, guesses = match
+        i = bisect_right(ends, start) - 1
+        candidate = costs[i] * cardinality ** (start - ends[i]) * max(guesses, MIN_MATCH_GUESSES)
+        if end == ends[-1]:
+            if candidate < costs[-1]:
+                costs[-1] = candidate
+                links[-1] = (match, i)
+        else:
+            carried = costs[-1] * cardinality ** (end - ends[-1])
+            ends.append(end)
+            if candidate < carried:
+                costs.append(candidate)
+                links.append((match, i))
+            else:
+                costs.append(carried)
+                links.append(None)
+    guesses = costs[-1] * cardinality ** (length - ends[-1])
+
+    # Walk the links back into a match list; brute-forced characters between matches form one run
+    matches = []
+    end = length
+    i = len(ends) - 1
+    while True:
+        while i and links[i] is None:
+            i -= 1
+        if ends[i] < end:
+            matches.append(("bruteforce", password[ends[i]:end], cardinality ** (end - ends[i])))
+        if not i:
+            break
+        (start, end, pattern, match_guesses), i = links[i]
+        matches.append((pattern, password[start:end], max(match_guesses, MIN_MATCH_GUESSES)))
+        end = start
+    matches.reverse()
+
+    return EntropyEstimate(math.log2(guesses), guesses, matches)
+
+
+# Function to estimate how many guesses an attacker needs for a password, and the entropy in bits.
+# Recognises dictionary words (with case changes and l33t substitutions), keyboard walks,
+# sequences, repeats and dates; everything else is priced as brute force.
+@instrumented("estimate_entropy")
+def estimate_entropy(password):
+    return _estimate(password)
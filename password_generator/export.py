@@ -0,0 +1,103 @@
+import csv
+import io
+import json
+
+from .batch import generate_batch
+from .breach import check_password_breach
+from .entropy import estimate_entropy
+from .parallel import iter_parallel
+from .strength import calculate_strength
+from .unique import iter_unique
+
+EXPORT_FORMATS = ["txt", "csv", "jsonl"]
+
+# Number of passwords generated and written per chunk
+DEFAULT_CHUNK_SIZE = 10000
+
+
+# Function to lazily yield n passwords, generating them one batch at a time
+def iter_passwords(mode, options, n, chunk_size=DEFAULT_CHUNK_SIZE, rng=None):
+    remaining = n
+    while remaining > 0:
+        batch = generate_batch(mode, options, min(chunk_size, remaining), rng)
+        remaining -= len(batch)
+        yield from batch
+
+
+# Function to turn passwords into export rows with optional strength, entropy and breach columns
+def iter_rows(passwords, include_strength=False, include_breach=False, include_entropy=False, rng=None):
+    for password in passwords:
+        row = {'password': password}
+        if include_strength:
+            strength, category, color, feedback = calculate_strength(password)
+            row['strength'] = strength
+            row['category'] = category
+        if include_entropy:
+            row['entropy_bits'] = round(estimate_entropy(password).bits, 1)
+        if include_breach:
+            is_breached, breach_message = check_password_breach(password, rng=rng)
+            row['breached'] = is_breached
+        yield row
+
+
+# Function to get the column names for a set of export options
+def export_columns(include_strength=False, include_breach=False, include_entropy=False):
+    columns = ['password']
+    if include_strength:
+        columns += ['strength', 'category']
+    if include_entropy:
+        columns.append('entropy_bits')
+    if include_breach:
+        columns.append('breached')
+    return columns
+
+
+# Function to format a chunk of rows as text in one of the export formats
+def format_rows(rows, fmt, columns, header=False):
+    if fmt == "txt":
+        return "".join(" | ".join(str(row[c]) for c in columns) + "\n" for row in rows)
+    if fmt == "jsonl":
+        return "".join(json.dumps(row) + "\n" for row in rows)
+    if fmt == "csv":
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=columns, lineterminator="\n")
+        if header:
+            writer.writeheader()
+        writer.writerows(rows)
+        return buffer.getvalue()
+    raise ValueError(f"Unknown export format: {fmt}")
+
+
+# Function to lazily yield the export as text chunks, holding at most one chunk in memory
+def iter_export_chunks(rows, fmt="txt", columns=("password",), chunk_size=DEFAULT_CHUNK_SIZE):
+    header = True
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield format_rows(chunk, fmt, columns, header)
+            header = False
+            chunk = []
+    if chunk or header:
+        yield format_rows(chunk, fmt, columns, header)
+
+
+# Function to write an export of n passwords to a text stream chunk by chunk.
+# With workers other than 1, generation is sharded across a process pool (None uses every core).
+# With unique=True or a seen set (e.g. a FingerprintIndex namespace) every password is distinct;
+# that generation runs in this process, since every draw is checked against one set.
+# rng is an optional randomness source (see rng.py); it can only drive generation in this process.
+def write_export(out, mode, options, n, fmt="txt", include_strength=False, include_breach=False,
+                 chunk_size=DEFAULT_CHUNK_SIZE, workers=1, include_entropy=False, unique=False, seen=None, rng=None):
+    if unique or seen is not None:
+        passwords = iter_unique(mode, options, n, seen, chunk_size, rng)
+    elif workers == 1:
+        passwords = iter_passwords(mode, options, n, chunk_size, rng)
+    elif rng is not None:
+        raise ValueError("A randomness source can only be used with a single worker")
+    else:
+        passwords = iter_parallel(mode, options, n, workers)
+    rows = iter_rows(passwords, include_strength, include_breach, include_entropy, rng)
+    columns = export_columns(include_strength, include_breach, include_entropy)
+    for text in iter_export_chunks(rows, fmt, columns, chunk_size):
+        out.write(text)
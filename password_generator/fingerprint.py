@@ -0,0 +1,231 @@
+import hashlib
+import mmap
+import os
+import threading
+from array import array
+from bisect import bisect_left
+
+# Slots are grown once the set is this full
+MAX_LOAD = 0.7
+DEFAULT_CAPACITY = 1 << 16
+# Fingerprints a FingerprintIndex holds in memory before writing them as a new segment
+DEFAULT_FLUSH_SIZE = 1 << 20
+# Size ratio below which a FingerprintIndex merges its newest segment into the one before it
+MERGE_RATIO = 4
+# Fingerprints sorted at a time while merging segments
+MERGE_BATCH = 1 << 16
+
+
+# Function to get the 64-bit fingerprint of a SHA-1 digest (0 is reserved for empty slots)
+def digest_fingerprint(digest):
+    return int.from_bytes(digest[:8], 'big') or 1
+
+
+# Function to get the 64-bit fingerprint of a password
+def password_fingerprint(password):
+    return digest_fingerprint(hashlib.sha1(password.encode('utf-8')).digest())
+
+
+# A set of 64-bit fingerprints in one flat array, with open addressing and linear probing.
+# The array doubles once it is MAX_LOAD full, so each member costs 8 / load bytes: about 11
+# just before a doubling and 23 just after it (16 on average), against the ~70 bytes of a
+# Python set of ints. Presizing with the expected count keeps it near the low end.
+# Fingerprints of distinct passwords collide with probability about n^2 / 2^65.
+class FingerprintSet:
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        size = 1
+        while size * MAX_LOAD < capacity:
+            size <<= 1
+        self._slots = array('Q', bytes(8 * size))
+        self._mask = size - 1
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self):
+        return (fingerprint for fingerprint in self._slots if fingerprint)
+
+    def __contains__(self, fingerprint):
+        slots = self._slots
+        mask = self._mask
+        i = fingerprint & mask
+        while True:
+            value = slots[i]
+            if value == fingerprint:
+                return True
+            if not value:
+                return False
+            i = (i + 1) & mask
+
+    # Function to add a fingerprint, returning True if it was not in the set yet
+    def add(self, fingerprint):
+        slots = self._slots
+        mask = self._mask
+        i = fingerprint & mask
+        while True:
+            value = slots[i]
+            if value == fingerprint:
+                return False
+            if not value:
+                break
+            i = (i + 1) & mask
+        slots[i] = fingerprint
+        self._count += 1
+        if self._count > MAX_LOAD * len(slots):
+            self._grow()
+        return True
+
+    def _grow(self):
+        old = self._slots
+        self._slots = array('Q', bytes(16 * len(old)))
+        self._mask = len(self._slots) - 1
+        self._count = 0
+        for fingerprint in old:
+            if fingerprint:
+                self.add(fingerprint)
+
+
+# Function to write the sorted fingerprints of older and newer merged to a file, without
+# repeats. Both are cut into batches of about MERGE_BATCH fingerprints covering the same range
+# of values, and each batch is merged and sorted as a whole.
+def _merge_sorted(f, older, newer):
+    step = max(1, MERGE_BATCH * len(newer) // (len(older) + len(newer)))
+    start = 0
+    for i in range(0, len(newer), step):
+        end = bisect_left(older, newer[i + step], start) if i + step < len(newer) else len(older)
+        f.write(array('Q', sorted(set(older[start:end]).union(newer[i:i + step]))))
+        start = end
+
+
+# A persistent set of fingerprints for uniqueness across runs, stored as sorted segment files
+# (8 bytes per fingerprint in the machine's byte order) that are memory-mapped and binary
+# searched, so lookups only touch a few pages however large the set grows. New fingerprints
+# collect in a FingerprintSet presized for flush_size (16 bytes each once full) and are
+# written every flush_size additions and on close as a new segment, costing only their own
+# size. While the newest segment is less than MERGE_RATIO times smaller than the one before,
+# a background thread merges the two; the result replaces them at the next flush. So there
+# are O(log n) segments and each fingerprint is rewritten O(log n) times in all, instead of
+# the whole file on every flush. The oldest segment is the file at path (the format of a
+# single-file index) and the others are path.1, path.2, ...; every file is replaced
+# atomically, and one left over by an interrupted merge only repeats fingerprints.
+class FingerprintIndex:
+    def __init__(self, path, flush_size=DEFAULT_FLUSH_SIZE):
+        self.path = path
+        self.flush_size = flush_size
+        self._pending = FingerprintSet(flush_size)
+        # (mmap, fingerprints) of every segment, oldest first
+        self._segments = []
+        self._merger = None
+        self._merge_error = None
+        self._open()
+
+    def _segment_path(self, level):
+        return f"{self.path}.{level}" if level else self.path
+
+    def _open_segment(self, level):
+        path = self._segment_path(level)
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size % 8:
+                raise ValueError(f"{path} is not a fingerprint index")
+            if not size:
+                return None, memoryview(b"").cast('Q')
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            return mm, memoryview(mm).cast('Q')
+
+    def _open(self):
+        level = 0
+        while os.path.exists(self._segment_path(level)):
+            self._segments.append(self._open_segment(level))
+            level += 1
+
+    @staticmethod
+    def _close_segment(segment):
+        mm, stored = segment
+        stored.release()
+        if mm is not None:
+            mm.close()
+
+    def __len__(self):
+        return sum(len(stored) for _, stored in self._segments) + len(self._pending)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __contains__(self, fingerprint):
+        if fingerprint in self._pending:
+            return True
+        for _, stored in self._segments:
+            i = bisect_left(stored, fingerprint)
+            if i < len(stored) and stored[i] == fingerprint:
+                return True
+        return False
+
+    # Function to add a fingerprint, returning True if it was not in the index yet
+    def add(self, fingerprint):
+        if fingerprint in self:
+            return False
+        self._pending.add(fingerprint)
+        if len(self._pending) >= self.flush_size:
+            self.flush()
+        return True
+
+    # Function to write the fingerprints added since the last flush as a new segment
+    def flush(self):
+        if not len(self._pending):
+            return
+        self._finish_merge()
+        level = len(self._segments)
+        temporary = f"{self.path}.{os.getpid()}.tmp"
+        with open(temporary, "wb") as f:
+            f.write(array('Q', sorted(self._pending)))
+        os.replace(temporary, self._segment_path(level))
+        self._segments.append(self._open_segment(level))
+        self._pending = FingerprintSet(self.flush_size)
+        self._start_merge()
+
+    def _merge_path(self):
+        return f"{self.path}.{os.getpid()}.merge.tmp"
+
+    # Function to start merging the two newest segments in the background if they are too close in size
+    def _start_merge(self):
+        if len(self._segments) > 1 and len(self._segments[-1][1]) * MERGE_RATIO > len(self._segments[-2][1]):
+            older, newer = self._segments[-2][1], self._segments[-1][1]
+            self._merger = threading.Thread(target=self._merge, args=(older, newer), daemon=True)
+            self._merger.start()
+
+    def _merge(self, older, newer):
+        try:
+            with open(self._merge_path(), "wb") as f:
+                _merge_sorted(f, older, newer)
+        except Exception as e:
+            self._merge_error = e
+
+    # Function to wait for the background merge and put its result in place of the two
+    # segments it came from, then carry on merging while the newest segments are close in size
+    def _finish_merge(self):
+        while self._merger is not None:
+            self._merger.join()
+            self._merger = None
+            if self._merge_error is not None:
+                error, self._merge_error = self._merge_error, None
+                raise error
+            level = len(self._segments) - 2
+            for segment in self._segments[level:]:
+                self._close_segment(segment)
+            os.replace(self._merge_path(), self._segment_path(level))
+            os.remove(self._segment_path(level + 1))
+            self._segments[level:] = [self._open_segment(level)]
+            self._start_merge()
+
+    # Function to flush, finish merging and release the files
+    def close(self):
+        self.flush()
+        self._finish_merge()
+        segments, self._segments = self._segments, []
+        for segment in segments:
+            self._close_segment(segment)
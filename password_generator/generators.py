@@ -0,0 +1,91 @@
+from .constants import SPECIAL_CHARS
+from .markov import get_markov_model, pronounceable_letters
+from .metrics import instrumented
+from .pattern import compile_pattern
+from .pin import pin_keyspace, unrank_pin
+from .policy import compile_policy
+from .rng import DEFAULT_SOURCE
+from .wordlist import resolve_wordlist
+
+
+# Function to generate a random password, sampled uniformly from every password that meets
+# the options by the strategy its compiled policy picked
+@instrumented("generate_random_password")
+def generate_random_password(length, use_lower=True, use_upper=True, use_digits=True, use_special=True, 
+                     exclude_similar=False, exclude_ambiguous=False, ensure_all_types=True, rng=None):
+    return compile_policy(length, use_lower, use_upper, use_digits, use_special,
+                          exclude_similar, exclude_ambiguous, ensure_all_types).generate(rng)
+
+# Function to generate a pronounceable password of exactly length characters.
+# The letters come from a character n-gram model trained on real words; the number and
+# special character take the last three positions.
+@instrumented("generate_pronounceable_password")
+def generate_pronounceable_password(length, capitalize=True, add_number=True, add_special=True, wordlist=None,
+                                    rng=None):
+    rng = DEFAULT_SOURCE if rng is None else rng
+    letters = pronounceable_letters(length, add_number, add_special)
+    password = get_markov_model(wordlist).sample(letters, rng)
+
+    # Apply options
+    if capitalize:
+        password = password.capitalize()
+
+    # Add a two-digit number if requested
+    if add_number:
+        password += f"{rng.randrange(100):02d}"
+
+    # Add a special character if requested
+    if add_special:
+        password += rng.choice(SPECIAL_CHARS)
+
+    return password
+
+# Function to generate a PIN, chosen uniformly from every PIN that meets the constraints
+@instrumented("generate_pin")
+def generate_pin(length, avoid_repeats=True, avoid_sequences=True, rng=None):
+    return unrank_pin((DEFAULT_SOURCE if rng is None else rng).randrange(pin_keyspace(length, avoid_repeats, avoid_sequences)),
+                      length, avoid_repeats, avoid_sequences)
+
+# Function to generate a passphrase
+@instrumented("generate_passphrase")
+def generate_passphrase(word_count, separator="-", capitalize_words=False, add_number=True, wordlist=None,
+                        min_word_length=None, max_word_length=None, charset=None, rng=None):
+    rng = DEFAULT_SOURCE if rng is None else rng
+
+    # Select random words
+    words = rng.sample(resolve_wordlist(wordlist, min_word_length, max_word_length, charset), word_count)
+
+    # Apply capitalization if requested
+    if capitalize_words:
+        words = [word.capitalize() for word in words]
+
+    # Join with separator
+    passphrase = separator.join(words)
+
+    # Add a number if requested
+    if add_number:
+        passphrase += separator + str(rng.randint(10, 99))
+
+    return passphrase
+
+# Function to generate a password based on a custom pattern
+@instrumented("generate_custom_password")
+def generate_custom_password(pattern, rng=None):
+    return compile_pattern(pattern).generate(rng)
+
+# Map each generation mode to the function implementing it
+MODE_FUNCTIONS = {
+    "Random": generate_random_password,
+    "Pronounceable": generate_pronounceable_password,
+    "PIN": generate_pin,
+    "Passphrase": generate_passphrase,
+    "Custom Pattern": generate_custom_password,
+}
+
+# Function to generate a password for a mode, passing options as keyword arguments.
+# rng is an optional randomness source (see rng.py); without one DEFAULT_SOURCE is used.
+@instrumented("generate_password")
+def generate_password(mode, options, rng=None):
+    if mode not in MODE_FUNCTIONS:
+        raise ValueError(f"Unknown generation mode: {mode}")
+    return MODE_FUNCTIONS[mode](**options, rng=rng)
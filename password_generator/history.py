@@ -0,0 +1,270 @@
+import hashlib
+import hmac
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from functools import lru_cache
+from itertools import islice
+
+# Environment variables configuring the history store used by the UI: a SQLite file to keep
+# history in (in-memory per session when unset), and the size and age limits
+HISTORY_DB_ENV = "PASSWORD_HISTORY_DB"
+HISTORY_MAX_ENTRIES_ENV = "PASSWORD_HISTORY_MAX_ENTRIES"
+HISTORY_MAX_TOTAL_ENV = "PASSWORD_HISTORY_MAX_TOTAL"
+HISTORY_MAX_AGE_ENV = "PASSWORD_HISTORY_MAX_AGE"
+# Hex-encoded secret the SQLite history keys its digests with. It is kept out of the database,
+# so a copy of the file alone cannot be used to test guesses against the digests.
+HISTORY_KEY_ENV = "PASSWORD_HISTORY_KEY"
+
+DEFAULT_MAX_ENTRIES = 1000
+# Most rows a SQLite history file keeps across all sessions, so sessions that are never
+# cleared (every closed browser tab) cannot grow the file without bound
+DEFAULT_MAX_TOTAL_ENTRIES = 100000
+DEFAULT_PAGE_SIZE = 50
+DEFAULT_EXPORT_CHUNK = 1000
+
+# Characters of a password kept visible in a masked preview, at the start and end
+PREVIEW_HEAD = 2
+PREVIEW_TAIL = 1
+MASK_CHAR = "•"
+# Passwords shorter than this, and passwords of these modes, are masked completely: the
+# visible characters would give away too much of a small keyspace
+MIN_PREVIEW_LENGTH = 12
+UNPREVIEWED_MODES = {"PIN"}
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+# Function to mask a password for display, keeping only a few characters at each end of
+# passwords long enough to spare them
+def mask_password(password, mode=None):
+    if len(password) < MIN_PREVIEW_LENGTH or mode in UNPREVIEWED_MODES:
+        return MASK_CHAR * len(password)
+    hidden = len(password) - PREVIEW_HEAD - PREVIEW_TAIL
+    return password[:PREVIEW_HEAD] + MASK_CHAR * hidden + password[-PREVIEW_TAIL:]
+
+
+# Function to build the history row shown to callers
+def _entry(password, created, mode, length):
+    return {
+        'password': password,
+        'timestamp': datetime.fromtimestamp(created).strftime(TIMESTAMP_FORMAT),
+        'length': length,
+        'type': mode,
+    }
+
+
+# Function to format one history row as an export line
+def _export_line(entry):
+    return f"{entry['password']} | {entry['type']} | {entry['timestamp']}\n"
+
+
+# In-memory password history for one session, kept as a ring buffer.
+# Once max_entries rows are held the oldest is dropped on every add, and rows older than
+# max_age seconds are dropped as they are reached, so memory stays bounded however long
+# the session runs. Passwords are held in plaintext and never written anywhere.
+class MemoryHistoryStore:
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, max_age=None):
+        if max_entries < 1:
+            raise ValueError("History must keep at least one entry")
+        self.max_entries = max_entries
+        self.max_age = max_age
+        # Bumped on every add and clear, so callers can tell when cached views are stale
+        self.version = 0
+        self._rows = deque(maxlen=max_entries)
+
+    # Function to add generated passwords of one mode to the history
+    def add_many(self, passwords, mode, created=None):
+        created = time.time() if created is None else created
+        self._rows.extend((password, created, mode) for password in passwords)
+        self.version += 1
+        self.evict()
+
+    def add(self, password, mode, created=None):
+        self.add_many([password], mode, created)
+
+    # Function to drop rows older than max_age
+    def evict(self, now=None):
+        if self.max_age is None:
+            return
+        cutoff = (time.time() if now is None else now) - self.max_age
+        while self._rows and self._rows[0][1] < cutoff:
+            self._rows.popleft()
+
+    def count(self):
+        self.evict()
+        return len(self._rows)
+
+    # Function to get one page of history rows, newest first
+    def page(self, offset=0, limit=DEFAULT_PAGE_SIZE):
+        self.evict()
+        return [_entry(password, created, mode, len(password))
+                for password, created, mode in islice(reversed(self._rows), offset, offset + limit)]
+
+    # Function to export the history oldest first, as text chunks of at most chunk_size lines
+    def iter_export(self, chunk_size=DEFAULT_EXPORT_CHUNK):
+        self.evict()
+        rows = list(self._rows)
+        for start in range(0, len(rows), chunk_size):
+            yield "".join(_export_line(_entry(password, created, mode, len(password)))
+                          for password, created, mode in rows[start:start + chunk_size])
+
+    def clear(self):
+        self._rows.clear()
+        self.version += 1
+
+
+# Open connections by database path, with a lock each, shared by every store on that file
+@lru_cache(maxsize=None)
+def _connect(path):
+    connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("""
+        CREATE TABLE IF NOT EXISTS history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            session TEXT NOT NULL,
+            created REAL NOT NULL,
+            mode TEXT NOT NULL,
+            length INTEGER NOT NULL,
+            preview TEXT NOT NULL,
+            digest BLOB NOT NULL
+        )""")
+    connection.execute("CREATE INDEX IF NOT EXISTS history_session ON history (session, id)")
+    connection.execute("CREATE INDEX IF NOT EXISTS history_digest ON history (digest)")
+    connection.execute("CREATE INDEX IF NOT EXISTS history_created ON history (created)")
+    # Older files kept the digest key in a meta table next to the digests; drop it
+    connection.execute("DROP TABLE IF EXISTS meta")
+    return connection, threading.Lock()
+
+
+# Function to get the digest key: the one in the environment, or else a random key for this
+# process, in which case contains() only matches passwords added since it started
+@lru_cache(maxsize=None)
+def _history_key():
+    if os.environ.get(HISTORY_KEY_ENV):
+        return bytes.fromhex(os.environ[HISTORY_KEY_ENV])
+    return os.urandom(32)
+
+
+# Password history kept in a local SQLite file, shared by every session using the same path.
+# Passwords are never stored: each row keeps a masked preview and a keyed SHA-256 digest,
+# which is enough to show and export the history and to check whether a password was issued
+# before, but not to recover it. The digest key (hash_key, or PASSWORD_HISTORY_KEY) is never
+# written to the file. On every add the session is cut to max_entries rows, and the
+# whole file to max_total_entries rows and max_age seconds, so abandoned sessions expire too.
+class SQLiteHistoryStore:
+    def __init__(self, path, session="default", max_entries=DEFAULT_MAX_ENTRIES, max_age=None,
+                 max_total_entries=DEFAULT_MAX_TOTAL_ENTRIES, hash_key=None):
+        if max_entries < 1 or max_total_entries < 1:
+            raise ValueError("History must keep at least one entry")
+        self.path = path
+        self.session = session
+        self.max_entries = max_entries
+        self.max_total_entries = max_total_entries
+        self.max_age = max_age
+        # Bumped on every add and clear, so callers can tell when cached views are stale
+        self.version = 0
+        self._connection, self._lock = _connect(path)
+        self._key = hash_key or _history_key()
+
+    # Function to compute the stored digest of a password
+    def digest(self, password):
+        return hmac.new(self._key, password.encode("utf-8"), hashlib.sha256).digest()
+
+    # Function to add generated passwords of one mode to the history in one transaction
+    def add_many(self, passwords, mode, created=None):
+        created = time.time() if created is None else created
+        rows = [(self.session, created, mode, len(password), mask_password(password, mode), self.digest(password))
+                for password in passwords]
+        with self._lock:
+            self._connection.execute("BEGIN")
+            try:
+                self._connection.executemany(
+                    "INSERT INTO history (session, created, mode, length, preview, digest) "
+                    "VALUES (?, ?, ?, ?, ?, ?)", rows)
+                self._evict()
+                self._connection.execute("COMMIT")
+                self.version += 1
+            except BaseException:
+                self._connection.execute("ROLLBACK")
+                raise
+
+    def add(self, password, mode, created=None):
+        self.add_many([password], mode, created)
+
+    # Function to drop rows of any session older than max_age, the oldest rows beyond
+    # max_total_entries, and this session's rows beyond max_entries. Callers hold the lock.
+    def _evict(self, now=None):
+        if self.max_age is not None:
+            cutoff = (time.time() if now is None else now) - self.max_age
+            self._connection.execute("DELETE FROM history WHERE created < ?", (cutoff,))
+        self._connection.execute(
+            "DELETE FROM history WHERE id <= (SELECT id FROM history ORDER BY id DESC LIMIT 1 OFFSET ?)",
+            (self.max_total_entries,))
+        self._connection.execute(
+            "DELETE FROM history WHERE session = ? AND id <= "
+            "(SELECT id FROM history WHERE session = ? ORDER BY id DESC LIMIT 1 OFFSET ?)",
+            (self.session, self.session, self.max_entries))
+
+    def evict(self, now=None):
+        with self._lock:
+            self._evict(now)
+
+    def count(self):
+        with self._lock:
+            self._evict()
+            return self._connection.execute("SELECT COUNT(*) FROM history WHERE session = ?",
+                                            (self.session,)).fetchone()[0]
+
+    # Function to get one page of history rows, newest first; passwords are masked previews
+    def page(self, offset=0, limit=DEFAULT_PAGE_SIZE):
+        with self._lock:
+            self._evict()
+            rows = self._connection.execute(
+                "SELECT preview, created, mode, length FROM history WHERE session = ? "
+                "ORDER BY id DESC LIMIT ? OFFSET ?", (self.session, limit, offset)).fetchall()
+        return [_entry(*row) for row in rows]
+
+    # Function to check whether a password is in this session's history
+    def contains(self, password):
+        with self._lock:
+            return self._connection.execute(
+                "SELECT 1 FROM history WHERE session = ? AND digest = ? LIMIT 1",
+                (self.session, self.digest(password))).fetchone() is not None
+
+    # Function to export the history oldest first, as text chunks of at most chunk_size lines.
+    # Rows are read a chunk at a time by id, so no more than one chunk is held in memory.
+    def iter_export(self, chunk_size=DEFAULT_EXPORT_CHUNK):
+        last_id = 0
+        while True:
+            with self._lock:
+                rows = self._connection.execute(
+                    "SELECT id, preview, created, mode, length FROM history WHERE session = ? AND id > ? "
+                    "ORDER BY id LIMIT ?", (self.session, last_id, chunk_size)).fetchall()
+            if not rows:
+                return
+            last_id = rows[-1][0]
+            yield "".join(_export_line(_entry(*row[1:])) for row in rows)
+
+    def clear(self):
+        with self._lock:
+            self._connection.execute("DELETE FROM history WHERE session = ?", (self.session,))
+            self.version += 1
+
+
+# Function to open the history store for a session: SQLite when a database path is given or
+# named in the environment, otherwise an in-memory ring buffer
+def open_history_store(session="default", path=None, max_entries=None, max_age=None, max_total_entries=None):
+    path = path or os.environ.get(HISTORY_DB_ENV)
+    if max_entries is None:
+        max_entries = int(os.environ.get(HISTORY_MAX_ENTRIES_ENV) or DEFAULT_MAX_ENTRIES)
+    if max_age is None and os.environ.get(HISTORY_MAX_AGE_ENV):
+        max_age = float(os.environ[HISTORY_MAX_AGE_ENV])
+    if path:
+        if max_total_entries is None:
+            max_total_entries = int(os.environ.get(HISTORY_MAX_TOTAL_ENV) or DEFAULT_MAX_TOTAL_ENTRIES)
+        return SQLiteHistoryStore(path, session, max_entries, max_age, max_total_entries)
+    return MemoryHistoryStore(max_entries, max_age)
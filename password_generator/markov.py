@@ -0,0 +1,159 @@
+import math
+from array import array
+from bisect import bisect_right
+from functools import lru_cache
+
+from .constants import LOWERCASE, PRONOUNCEABLE_WORDS, SPECIAL_CHARS
+from .metrics import cached
+from .rng import DEFAULT_SOURCE
+from .sampling import random_bytes
+from .wordlist import load_wordlist
+
+DEFAULT_ORDER = 2
+
+# Bits a pronounceable password should reach by default: about what the consonant-vowel
+# scheme this model replaced gave its default 10 characters. The model keeps the letter
+# statistics of real words, so it draws fewer bits a letter and reaches this with more letters.
+TARGET_BITS = 32
+# Longest password pronounceable_length will suggest
+MAX_TARGET_LENGTH = 128
+
+# Marker used to pad the context at the start of a word
+START = "^"
+
+
+# Character n-gram model for pronounceable text.
+# Every context (the previous `order` letters) maps to the letters seen after it and their
+# cumulative counts, so drawing the next letter is one binary search. Contexts that were
+# never seen back off to shorter ones, down to single-letter frequencies.
+class MarkovModel:
+    def __init__(self, order, transitions):
+        self.order = order
+        self._transitions = transitions
+        self._entropy = {}
+
+    # Function to train a model from words; anything that is not a-z is skipped
+    @classmethod
+    def train(cls, words, order=DEFAULT_ORDER):
+        counts = {}
+        for word in words:
+            word = word.strip().lower()
+            if not word or any(c not in LOWERCASE for c in word):
+                continue
+            padded = START * order + word
+            for i in range(order, len(padded)):
+                # Record the letter under every context length, for back-off
+                for k in range(order + 1):
+                    context = padded[i - k:i]
+                    following = counts.setdefault(context, {})
+                    following[padded[i]] = following.get(padded[i], 0) + 1
+        if "" not in counts:
+            raise ValueError("Cannot train a pronounceable model without any a-z words")
+
+        transitions = {}
+        for context, following in counts.items():
+            chars = "".join(sorted(following))
+            cumulative = array("I")
+            total = 0
+            for char in chars:
+                total += following[char]
+                cumulative.append(total)
+            entropy = -sum(n / total * math.log2(n / total) for n in following.values())
+            transitions[context] = (chars, cumulative, total, entropy)
+        return cls(order, transitions)
+
+    # Function to get the transition table for the context ending a prefix, backing off as needed
+    def _next(self, prefix):
+        padded = (START * self.order + prefix)[-self.order:] if self.order else ""
+        for k in range(len(padded), -1, -1):
+            table = self._transitions.get(padded[len(padded) - k:])
+            if table is not None:
+                return table
+        raise KeyError(prefix)
+
+    # Function to generate one lowercase string of exactly length letters
+    def sample(self, length, rng=None):
+        rng = DEFAULT_SOURCE if rng is None else rng
+        text = ""
+        for _ in range(length):
+            chars, cumulative, total, entropy = self._next(text)
+            text += chars[bisect_right(cumulative, rng.randrange(total))]
+        return text
+
+    # Function to generate n strings of exactly length letters, reading all randomness up front.
+    # Each draw is a 64-bit random value scaled onto the context's total count.
+    def sample_batch(self, n, length, rng=None):
+        draws = array("Q")
+        draws.frombytes(random_bytes(8 * n * length, rng))
+        results = []
+        position = 0
+        for _ in range(n):
+            text = ""
+            for _ in range(length):
+                chars, cumulative, total, entropy = self._next(text)
+                text += chars[bisect_right(cumulative, (draws[position] * total) >> 64)]
+                position += 1
+            results.append(text)
+        return results
+
+    # Function to compute the Shannon entropy in bits of a length-letter string from this model.
+    # Tracks the probability of every context position by position and sums the expected
+    # entropy of the next letter. Cached per length.
+    def entropy(self, length):
+        if length in self._entropy:
+            return self._entropy[length]
+        bits = 0.0
+        contexts = {"": 1.0}
+        for _ in range(length):
+            following = {}
+            for prefix, probability in contexts.items():
+                chars, cumulative, total, entropy = self._next(prefix)
+                bits += probability * entropy
+                previous = 0
+                for char, count in zip(chars, cumulative):
+                    key = (prefix + char)[-self.order:] if self.order else ""
+                    following[key] = following.get(key, 0.0) + probability * (count - previous) / total
+                    previous = count
+            contexts = following
+        self._entropy[length] = bits
+        return bits
+
+
+# Function to get the model trained on a word list (a file path or a WordList), or on the
+# built-in PRONOUNCEABLE_WORDS, once per source
+@cached("markov_model")
+@lru_cache(maxsize=16)
+def get_markov_model(wordlist=None, order=DEFAULT_ORDER):
+    if wordlist is None:
+        return MarkovModel.train(PRONOUNCEABLE_WORDS, order)
+    if isinstance(wordlist, str):
+        wordlist = load_wordlist(wordlist)
+    return MarkovModel.train(wordlist, order)
+
+
+# Function to get the number of model letters in a pronounceable password of a given length
+def pronounceable_letters(length, add_number=True, add_special=True):
+    letters = length - (2 if add_number else 0) - (1 if add_special else 0)
+    if letters < 1:
+        raise ValueError("Password length is too short for the selected options")
+    return letters
+
+
+# Function to get the entropy in bits of a pronounceable password: the model's letters plus
+# the two-digit number and special character when they are added
+def pronounceable_entropy(length, add_number=True, add_special=True, wordlist=None):
+    bits = get_markov_model(wordlist).entropy(pronounceable_letters(length, add_number, add_special))
+    if add_number:
+        bits += math.log2(100)
+    if add_special:
+        bits += math.log2(len(SPECIAL_CHARS))
+    return bits
+
+
+# Function to get the shortest pronounceable password length whose entropy reaches bits
+def pronounceable_length(bits=TARGET_BITS, add_number=True, add_special=True, wordlist=None):
+    shortest = (2 if add_number else 0) + (1 if add_special else 0) + 1
+    for length in range(shortest, MAX_TARGET_LENGTH + 1):
+        if pronounceable_entropy(length, add_number, add_special, wordlist) >= bits:
+            return length
+    raise ValueError(f"The pronounceable model cannot reach {bits} bits in {MAX_TARGET_LENGTH} characters")
@@ -0,0 +1,169 @@
+import os
+import threading
+import time
+from bisect import bisect_left
+from functools import wraps
+
+# Instrumentation is switched on by setting this environment variable to 1 before the package
+# is imported. When it is off the decorators below return the functions unchanged and the
+# counters in sampling loops are skipped behind a constant, so there is no overhead at all.
+METRICS_ENV = "PASSWORD_METRICS"
+METRICS_ENABLED = os.environ.get(METRICS_ENV, "") not in ("", "0")
+# Port the Streamlit app serves /metrics on when instrumentation is enabled
+METRICS_PORT_ENV = "PASSWORD_METRICS_PORT"
+
+PREFIX = "password_generator"
+
+# Upper bounds in seconds of the latency histogram buckets
+LATENCY_BUCKETS = (1e-6, 2.5e-6, 5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4,
+                   1e-3, 2.5e-3, 1e-2, 0.1, 1.0)
+
+_lock = threading.Lock()
+# Function name -> [bucket counts, total seconds, call count, error count]
+_latencies = {}
+# Loop name -> [runs, iterations, rejected draws]
+_rejections = {}
+# Cache name -> lru_cache-wrapped function, read with cache_info() at export time
+_caches = {}
+
+
+# Decorator to record call counts, errors and a latency histogram for a function under a name
+def instrumented(name):
+    def decorator(function):
+        if not METRICS_ENABLED:
+            return function
+        stats = _latencies.setdefault(name, [[0] * (len(LATENCY_BUCKETS) + 1), 0.0, 0, 0])
+
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            except Exception:
+                with _lock:
+                    stats[3] += 1
+                raise
+            finally:
+                elapsed = time.perf_counter() - start
+                with _lock:
+                    stats[0][bisect_left(LATENCY_BUCKETS, elapsed)] += 1
+                    stats[1] += elapsed
+                    stats[2] += 1
+        return wrapper
+    return decorator
+
+
+# Decorator to report an lru_cache-wrapped function's hit rate under a name.
+# It only registers the function, so it costs nothing per call either way.
+def cached(name):
+    def decorator(function):
+        _caches[name] = function
+        return function
+    return decorator
+
+
+# Function to record one run of a rejection-sampling loop: how many rounds it took and how
+# many draws it threw away. Callers check METRICS_ENABLED first.
+def record_rejections(name, iterations, rejected):
+    with _lock:
+        stats = _rejections.setdefault(name, [0, 0, 0])
+        stats[0] += 1
+        stats[1] += iterations
+        stats[2] += rejected
+
+
+# Function to clear every recorded latency and rejection count
+def reset_metrics():
+    with _lock:
+        for stats in _latencies.values():
+            stats[0] = [0] * (len(LATENCY_BUCKETS) + 1)
+            stats[1] = 0.0
+            stats[2] = 0
+            stats[3] = 0
+        _rejections.clear()
+
+
+# Function to render every metric in the Prometheus text exposition format.
+# Counts are per process: worker processes of the parallel and service pools keep their own.
+def render_metrics():
+    lines = []
+    with _lock:
+        latencies = {name: (list(stats[0]), stats[1], stats[2], stats[3]) for name, stats in _latencies.items()}
+        rejections = {name: list(stats) for name, stats in _rejections.items()}
+
+    lines.append(f"# HELP {PREFIX}_call_duration_seconds Latency of instrumented calls")
+    lines.append(f"# TYPE {PREFIX}_call_duration_seconds histogram")
+    for name, (buckets, total, count, errors) in sorted(latencies.items()):
+        cumulative = 0
+        for bound, bucket in zip(LATENCY_BUCKETS + (float("inf"),), buckets):
+            cumulative += bucket
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            lines.append(f'{PREFIX}_call_duration_seconds_bucket{{function="{name}",le="{le}"}} {cumulative}')
+        lines.append(f'{PREFIX}_call_duration_seconds_sum{{function="{name}"}} {total!r}')
+        lines.append(f'{PREFIX}_call_duration_seconds_count{{function="{name}"}} {count}')
+
+    lines.append(f"# HELP {PREFIX}_call_errors_total Instrumented calls that raised")
+    lines.append(f"# TYPE {PREFIX}_call_errors_total counter")
+    for name, (buckets, total, count, errors) in sorted(latencies.items()):
+        lines.append(f'{PREFIX}_call_errors_total{{function="{name}"}} {errors}')
+
+    lines.append(f"# HELP {PREFIX}_sampling_runs_total Runs of each rejection-sampling loop")
+    lines.append(f"# TYPE {PREFIX}_sampling_runs_total counter")
+    for name, (runs, iterations, rejected) in sorted(rejections.items()):
+        lines.append(f'{PREFIX}_sampling_runs_total{{loop="{name}"}} {runs}')
+    lines.append(f"# HELP {PREFIX}_sampling_iterations_total Rounds taken by each rejection-sampling loop")
+    lines.append(f"# TYPE {PREFIX}_sampling_iterations_total counter")
+    for name, (runs, iterations, rejected) in sorted(rejections.items()):
+        lines.append(f'{PREFIX}_sampling_iterations_total{{loop="{name}"}} {iterations}')
+    lines.append(f"# HELP {PREFIX}_sampling_rejected_total Draws thrown away by each rejection-sampling loop")
+    lines.append(f"# TYPE {PREFIX}_sampling_rejected_total counter")
+    for name, (runs, iterations, rejected) in sorted(rejections.items()):
+        lines.append(f'{PREFIX}_sampling_rejected_total{{loop="{name}"}} {rejected}')
+
+    infos = sorted((name, function.cache_info()) for name, function in _caches.items())
+    lines.append(f"# HELP {PREFIX}_cache_hits_total Cache hits")
+    lines.append(f"# TYPE {PREFIX}_cache_hits_total counter")
+    for name, info in infos:
+        lines.append(f'{PREFIX}_cache_hits_total{{cache="{name}"}} {info.hits}')
+    lines.append(f"# HELP {PREFIX}_cache_misses_total Cache misses")
+    lines.append(f"# TYPE {PREFIX}_cache_misses_total counter")
+    for name, info in infos:
+        lines.append(f'{PREFIX}_cache_misses_total{{cache="{name}"}} {info.misses}')
+    lines.append(f"# HELP {PREFIX}_cache_entries Entries currently held in each cache")
+    lines.append(f"# TYPE {PREFIX}_cache_entries gauge")
+    for name, info in infos:
+        lines.append(f'{PREFIX}_cache_entries{{cache="{name}"}} {info.currsize}')
+    return "\n".join(lines) + "\n"
+
+
+# Function to write the metrics to a file atomically, e.g. for a node_exporter textfile collector
+def write_metrics(path):
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "w", encoding="utf-8") as f:
+        f.write(render_metrics())
+    os.replace(temporary, path)
+
+
+# Function to serve the metrics at http://host:port/metrics from a background thread.
+# http.server is imported here rather than at the top, since most processes never serve metrics.
+def serve_metrics(port, host="127.0.0.1"):
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?", 1)[0] != "/metrics":
+                self.send_error(404)
+                return
+            payload = render_metrics().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    return server
@@ -0,0 +1,60 @@
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from .batch import generate_batch
+
+# Number of passwords each worker generates per task
+DEFAULT_SHARD_SIZE = 50000
+
+
+# Function run in a worker to generate one shard
+def _generate_shard(mode, options, size):
+    return generate_batch(mode, options, size)
+
+
+# Function to split n into shard sizes
+def shard_sizes(n, shard_size=DEFAULT_SHARD_SIZE):
+    full, rest = divmod(n, shard_size)
+    return [shard_size] * full + ([rest] if rest else [])
+
+
+# Function to generate n passwords across a pool of worker processes, yielding shards as lists.
+# At most two shards per worker are in flight, so memory stays bounded for any n.
+# With ordered=True shards are yielded in submission order, otherwise as soon as they finish.
+def iter_parallel_shards(mode, options, n, workers=None, shard_size=DEFAULT_SHARD_SIZE, ordered=True):
+    workers = workers or os.cpu_count() or 1
+    sizes = iter(shard_sizes(n, shard_size))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = []
+        for size in sizes:
+            pending.append(executor.submit(_generate_shard, mode, options, size))
+            if len(pending) >= workers * 2:
+                break
+
+        while pending:
+            if ordered:
+                done = [pending.pop(0)]
+            else:
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                done = [future for future in pending if future in finished]
+                pending = [future for future in pending if future not in finished]
+
+            for future in done:
+                size = next(sizes, None)
+                if size is not None:
+                    pending.append(executor.submit(_generate_shard, mode, options, size))
+                yield future.result()
+
+
+# Function to lazily yield n passwords generated across a pool of worker processes
+def iter_parallel(mode, options, n, workers=None, shard_size=DEFAULT_SHARD_SIZE, ordered=True):
+    for shard in iter_parallel_shards(mode, options, n, workers, shard_size, ordered):
+        yield from shard
+
+
+# Function to generate n passwords across a pool of worker processes and return them as a list
+def generate_parallel(mode, options, n, workers=None, shard_size=DEFAULT_SHARD_SIZE, ordered=True):
+    passwords = []
+    for shard in iter_parallel_shards(mode, options, n, workers, shard_size, ordered):
+        passwords.extend(shard)
+    return passwords
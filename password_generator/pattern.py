@@ -0,0 +1,154 @@
+import math
+from functools import lru_cache
+from itertools import repeat
+
+from .constants import DIGITS, LOWERCASE, SPECIAL_CHARS, UPPERCASE
+from .metrics import cached
+from .rng import DEFAULT_SOURCE
+from .sampling import sample_below, sample_chars
+
+# Pools used by Custom Pattern placeholders
+PATTERN_POOLS = {
+    'a': LOWERCASE,
+    'A': UPPERCASE,
+    '9': DIGITS,
+    '#': SPECIAL_CHARS,
+    'x': LOWERCASE + UPPERCASE + DIGITS + SPECIAL_CHARS,
+}
+
+# Longest password a pattern may produce
+MAX_PATTERN_LENGTH = 4096
+# Most characters the classes of one pattern may expand to, all classes together
+MAX_CLASS_CHARS = 1 << 16
+
+
+# A Custom Pattern compiled into slots. Each slot is (chars, count, literal): literal slots
+# emit chars count times, the others draw count characters from the chars pool.
+class CompiledPattern:
+    def __init__(self, pattern, slots):
+        self.pattern = pattern
+        self.slots = tuple(slots)
+        self.length = sum(len(chars) * count if literal else count for chars, count, literal in self.slots)
+        self.entropy = sum(count * math.log2(len(chars)) for chars, count, literal in self.slots if not literal)
+        self.keyspace = math.prod(len(chars) ** count for chars, count, literal in self.slots if not literal)
+
+    def __repr__(self):
+        return f"CompiledPattern({self.pattern!r}, length={self.length}, entropy={self.entropy:.1f})"
+
+    # Function to generate one password from the pattern
+    def generate(self, rng=None):
+        rng = DEFAULT_SOURCE if rng is None else rng
+        parts = []
+        for chars, count, literal in self.slots:
+            if literal:
+                parts.append(chars * count)
+            else:
+                parts.append(''.join(rng.choices(chars, k=count)))
+        return ''.join(parts)
+
+    # Function to generate n passwords at once, filling each slot for all n outputs in one draw
+    def generate_batch(self, n, rng=None):
+        if not self.slots:
+            return [''] * n
+        columns = []
+        for chars, count, literal in self.slots:
+            if literal:
+                columns.append(repeat(chars * count, n))
+                continue
+            if all(ord(c) < 256 for c in chars):
+                drawn = sample_chars(chars, n * count, rng)
+            else:
+                drawn = ''.join(chars[i] for i in sample_below(len(chars), n * count, rng))
+            if count == 1:
+                columns.append(drawn)
+            else:
+                columns.append([drawn[i * count:(i + 1) * count] for i in range(n)])
+        return [''.join(parts) for parts in zip(*columns)]
+
+
+# Function to expand a character class body such as "a-f0-9_" into its characters,
+# raising ValueError past budget characters
+def _expand_class(body, budget=MAX_CLASS_CHARS):
+    chars = []
+    i = 0
+    while i < len(body):
+        if body[i] == '\\' and i + 1 < len(body):
+            chars.append(body[i + 1])
+            i += 2
+        elif i + 2 < len(body) and body[i + 1] == '-':
+            start, end = body[i], body[i + 2]
+            if ord(start) > ord(end):
+                raise ValueError(f"Invalid range in pattern class: {start}-{end}")
+            if len(chars) + ord(end) - ord(start) >= budget:
+                raise ValueError(f"Pattern classes may hold at most {MAX_CLASS_CHARS:,} characters")
+            chars.extend(chr(c) for c in range(ord(start), ord(end) + 1))
+            i += 3
+        else:
+            chars.append(body[i])
+            i += 1
+    # Keep the first occurrence of each character so every character is equally likely
+    return ''.join(dict.fromkeys(chars))
+
+
+# Function to read a {n} repetition count at position i, returning (count, next position)
+def _read_count(pattern, i):
+    if i < len(pattern) and pattern[i] == '{':
+        end = pattern.find('}', i)
+        if end > i + 1 and pattern[i + 1:end].isdigit():
+            return int(pattern[i + 1:end]), end + 1
+    return 1, i
+
+
+# Function to compile a Custom Pattern into slots, cached per pattern string.
+# Grammar:
+#   a A 9 # x   lowercase, uppercase, digit, special, any character
+#   [a-f0-9]    one character from a class (ranges and single characters)
+#   {n}         repeat the previous placeholder, class or literal n times
+#   \c          the literal character c
+# Any other character is kept literally, as are braces and brackets that do not form
+# a count or class. Raises ValueError for patterns whose passwords would be longer than
+# MAX_PATTERN_LENGTH, checked before any keyspace is computed.
+@cached("compiled_pattern")
+@lru_cache(maxsize=256)
+def compile_pattern(pattern):
+    slots = []
+    length = class_chars = 0
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == '\\' and i + 1 < len(pattern):
+            chars, literal = pattern[i + 1], True
+            i += 2
+        elif char == '[' and pattern.find(']', i + 2) > 0:
+            end = pattern.find(']', i + 2)
+            chars, literal = _expand_class(pattern[i + 1:end], MAX_CLASS_CHARS - class_chars), False
+            class_chars += len(chars)
+            i = end + 1
+        elif char in PATTERN_POOLS:
+            chars, literal = PATTERN_POOLS[char], False
+            i += 1
+        else:
+            chars, literal = char, True
+            i += 1
+
+        count, i = _read_count(pattern, i)
+        length += len(chars) * count if literal else count
+        if length > MAX_PATTERN_LENGTH:
+            raise ValueError(f"Patterns may produce at most {MAX_PATTERN_LENGTH:,} characters")
+        if not literal and len(chars) == 1:
+            # A one-character class is just a literal
+            literal = True
+        if literal and slots and slots[-1][2] and count == 1 and slots[-1][1] == 1:
+            # Merge runs of single literals into one slot
+            slots[-1] = (slots[-1][0] + chars, 1, True)
+        elif not literal and slots and not slots[-1][2] and slots[-1][0] == chars:
+            # Merge consecutive draws from the same pool, so "aaa" runs like "a{3}"
+            slots[-1] = (chars, slots[-1][1] + count, False)
+        elif count:
+            slots.append((chars, count, literal))
+    return CompiledPattern(pattern, slots)
+
+
+# Function to get the entropy in bits of passwords generated from a pattern
+def pattern_entropy(pattern):
+    return compile_pattern(pattern).entropy
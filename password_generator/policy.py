@@ -0,0 +1,147 @@
+import math
+from functools import lru_cache
+
+from .metrics import METRICS_ENABLED, cached, record_rejections
+from .pools import get_char_pool
+from .rng import DEFAULT_SOURCE
+from .sampling import sample_below, sample_bytes
+
+# Rejection sampling is used while at least this fraction of unconstrained draws is valid;
+# below it the constructive sampler is cheaper
+MIN_ACCEPTANCE = 0.25
+# Most rejection rounds before falling back to the constructive sampler, so no call can loop
+# for long whatever the options
+MAX_REJECTION_ROUNDS = 32
+
+
+# A Random-mode policy compiled once per combination of options.
+# Checks up front that the options can be met, counts exactly how many passwords satisfy them,
+# and picks how to sample uniformly from that set:
+#   direct        every string over the pool is valid, so characters are drawn independently
+#   rejection     strings over the pool are drawn and the ones missing a required type are
+#                 redrawn, when most draws are valid
+#   constructive  a uniform rank in [0, keyspace) is decoded straight into a valid password,
+#                 when too many draws would be rejected
+class PasswordPolicy:
+    def __init__(self, length, use_lower=True, use_upper=True, use_digits=True, use_special=True,
+                 exclude_similar=False, exclude_ambiguous=False, ensure_all_types=True):
+        self.pool = get_char_pool(use_lower, use_upper, use_digits, use_special, exclude_similar, exclude_ambiguous)
+        if not self.pool.chars:
+            raise ValueError("Please select at least one character type")
+        if length < 1:
+            raise ValueError("Password length must be at least 1")
+        self.length = length
+        self.required_classes = self.pool.required_classes if ensure_all_types else ()
+        if len(self.required_classes) > length:
+            raise ValueError(f"A {length}-character password cannot include all "
+                             f"{len(self.required_classes)} selected character types")
+        # Translation of every pool character to the digit of its required type, so a batch
+        # of candidates is classified with one translate and checked with substring tests
+        self._type_table = str.maketrans({c: str(i) for i, chars in enumerate(self.required_classes) for c in chars})
+        self._type_digits = tuple(str(i) for i in range(len(self.required_classes)))
+        # Classes the pool is split into for counting, and the coverage bit each one sets
+        self._classes = self.required_classes or (self.pool.chars,)
+        self._bits = tuple(1 << i for i in range(len(self.required_classes))) or (0,)
+
+        self._ways = self._count_completions()
+        self.keyspace = self._ways[length][0]
+        self.entropy = math.log2(self.keyspace)
+        self.acceptance = self.keyspace / self.pool.size ** length
+        if self.acceptance == 1:
+            self.strategy = "direct"
+        elif self.acceptance >= MIN_ACCEPTANCE:
+            self.strategy = "rejection"
+        else:
+            self.strategy = "constructive"
+
+    def __repr__(self):
+        return (f"PasswordPolicy(length={self.length}, pool={self.pool.size}, "
+                f"entropy={self.entropy:.1f}, strategy={self.strategy!r})")
+
+    # Function to build the completion counts: ways[k][covered] is the number of ways to fill
+    # k more positions so every required type ends up used, given the types already covered
+    # (a bitmask). The required types partition the pool, so each character sets one bit;
+    # with no required types the whole pool is one class that sets none.
+    def _count_completions(self):
+        full = sum(self._bits)
+        ways = [[1 if covered == full else 0 for covered in range(full + 1)]]
+        for k in range(1, self.length + 1):
+            previous = ways[k - 1]
+            ways.append([sum(len(chars) * previous[covered | bit] for chars, bit in zip(self._classes, self._bits))
+                         for covered in range(full + 1)])
+        return ways
+
+    # Function to check whether a password uses every required type
+    def _valid(self, password):
+        types = password.translate(self._type_table)
+        return all(digit in types for digit in self._type_digits)
+
+    # Function to decode a rank in [0, keyspace) into the valid password with that number
+    def unrank(self, rank):
+        ways = self._ways
+        covered = 0
+        password = []
+        for remaining in range(self.length - 1, -1, -1):
+            following = ways[remaining]
+            for chars, bit in zip(self._classes, self._bits):
+                after = covered | bit
+                block = len(chars) * following[after]
+                if rank < block:
+                    password.append(chars[rank // following[after]])
+                    rank %= following[after]
+                    covered = after
+                    break
+                rank -= block
+        return ''.join(password)
+
+    # Function to generate one password
+    def generate(self, rng=None):
+        rng = DEFAULT_SOURCE if rng is None else rng
+        if self.strategy == "direct":
+            return ''.join(rng.choices(self.pool.chars, k=self.length))
+        if self.strategy == "rejection":
+            for attempt in range(1, MAX_REJECTION_ROUNDS + 1):
+                password = ''.join(rng.choices(self.pool.chars, k=self.length))
+                if self._valid(password):
+                    if METRICS_ENABLED:
+                        record_rejections("policy", attempt, attempt - 1)
+                    return password
+        return self.unrank(rng.randrange(self.keyspace))
+
+    # Function to generate n passwords at once
+    def generate_batch(self, n, rng=None):
+        alphabet = self.pool.chars.encode('latin-1')
+        length = self.length
+        if self.strategy == "direct":
+            text = sample_bytes(alphabet, n * length, rng).decode('latin-1')
+            return [text[i * length:(i + 1) * length] for i in range(n)]
+
+        passwords = []
+        if self.strategy == "rejection":
+            rounds = drawn = 0
+            while len(passwords) < n and rounds < MAX_REJECTION_ROUNDS:
+                # Draw enough candidates for the expected acceptance rate, plus some slack
+                count = int((n - len(passwords)) / self.acceptance * 1.1) + 8
+                text = sample_bytes(alphabet, count * length, rng).decode('latin-1')
+                types = text.translate(self._type_table)
+                digits = self._type_digits
+                for i in range(0, count * length, length):
+                    chunk = types[i:i + length]
+                    if all(digit in chunk for digit in digits):
+                        passwords.append(text[i:i + length])
+                rounds += 1
+                drawn += count
+            if METRICS_ENABLED:
+                record_rejections("policy_batch", rounds, drawn - len(passwords))
+            del passwords[n:]
+        passwords.extend(self.unrank(rank) for rank in sample_below(self.keyspace, n - len(passwords), rng))
+        return passwords
+
+
+# Function to get the compiled policy for a combination of Random-mode options
+@cached("policy")
+@lru_cache(maxsize=256)
+def compile_policy(length, use_lower=True, use_upper=True, use_digits=True, use_special=True,
+                   exclude_similar=False, exclude_ambiguous=False, ensure_all_types=True):
+    return PasswordPolicy(length, use_lower, use_upper, use_digits, use_special,
+                          exclude_similar, exclude_ambiguous, ensure_all_types)
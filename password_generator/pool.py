@@ -0,0 +1,164 @@
+import json
+import os
+import threading
+import weakref
+from collections import deque
+
+from .batch import generate_batch
+
+DEFAULT_CAPACITY = 10000
+# Fraction of capacity below which a refill starts
+DEFAULT_LOW_WATER = 0.25
+# Passwords generated per refill step, so takers never wait long for the GIL
+DEFAULT_REFILL_BATCH = 500
+# Most pools get_pool keeps, so arbitrary options cannot grow memory without bound
+MAX_POOLS = 32
+
+# Every live pool, so a forked child can drop the secrets it inherited
+_live_pools = weakref.WeakSet()
+
+# Shared pools by mode and options, for get_pool
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+# A pool of pre-generated passwords for one mode and set of options.
+# Passwords sit in a deque: popleft is atomic, so every password is removed by exactly one
+# taker without a lock, and is gone from the pool once issued. A background thread refills
+# the pool in small batches whenever it drops below the low-water mark; with an executor
+# the batches are generated in another process instead. When the pool is empty, take()
+# generates a password on the spot rather than waiting.
+class PasswordPool:
+    def __init__(self, mode, options, capacity=DEFAULT_CAPACITY, low_water=DEFAULT_LOW_WATER,
+                 refill_batch=DEFAULT_REFILL_BATCH, executor=None, prefill=True):
+        if capacity < 1:
+            raise ValueError("Pool capacity must be at least 1")
+        self.mode = mode
+        self.options = dict(options)
+        self.capacity = capacity
+        self.low_water = max(int(capacity * low_water), 1)
+        self.refill_batch = min(refill_batch, capacity)
+        self.executor = executor
+        self.issued = 0
+        self.misses = 0
+        self.refills = 0
+        self._passwords = deque()
+        self._wanted = threading.Event()
+        self._closed = False
+
+        # Check the options now, so a bad policy fails here rather than in the refill thread
+        self._passwords.extend(self._generate(1))
+        if prefill:
+            self._fill()
+        self._thread = threading.Thread(target=self._refill_loop, name=f"password-pool-{self.mode}", daemon=True)
+        self._thread.start()
+        self._wanted.set()
+        _live_pools.add(self)
+
+    def __len__(self):
+        return len(self._passwords)
+
+    def __repr__(self):
+        return f"PasswordPool({self.mode!r}, {len(self)}/{self.capacity}, issued={self.issued}, misses={self.misses})"
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _generate(self, n):
+        if self.executor is not None:
+            return self.executor.submit(generate_batch, self.mode, self.options, n).result()
+        return generate_batch(self.mode, self.options, n)
+
+    # Function to top the pool up to capacity, one refill batch at a time
+    def _fill(self):
+        while not self._closed:
+            missing = self.capacity - len(self._passwords)
+            if missing <= 0:
+                return
+            self._passwords.extend(self._generate(min(missing, self.refill_batch)))
+            self.refills += 1
+
+    def _refill_loop(self):
+        while not self._closed:
+            self._wanted.wait()
+            self._wanted.clear()
+            try:
+                self._fill()
+            except Exception:
+                # A failing refill leaves takers on the synchronous path; try again on the next take
+                pass
+
+    # Function to take one password, which is never handed out again
+    def take(self):
+        try:
+            password = self._passwords.popleft()
+        except IndexError:
+            self.misses += 1
+            password = generate_batch(self.mode, self.options, 1)[0]
+        self.issued += 1
+        if len(self._passwords) < self.low_water:
+            self._wanted.set()
+        return password
+
+    # Function to take n passwords, generating any the pool cannot supply in one batch
+    def take_many(self, n):
+        passwords = []
+        popleft = self._passwords.popleft
+        try:
+            for _ in range(n):
+                passwords.append(popleft())
+        except IndexError:
+            self.misses += n - len(passwords)
+            passwords.extend(generate_batch(self.mode, self.options, n - len(passwords)))
+        self.issued += n
+        if len(self._passwords) < self.low_water:
+            self._wanted.set()
+        return passwords
+
+    # Function to stop refilling and drop every pooled password
+    def close(self):
+        self._closed = True
+        self._wanted.set()
+        self._passwords.clear()
+
+
+# Function run in a forked child. The inherited passwords are also in the parent's pools, so
+# the child's copies are emptied and closed (their refill threads did not survive the fork);
+# takes from them fall back to generating on the spot, and get_pool starts fresh pools.
+def _clear_pools_after_fork():
+    global _pools_lock
+    for pool in list(_live_pools):
+        pool._closed = True
+        pool._passwords.clear()
+    _pools.clear()
+    _pools_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_clear_pools_after_fork)
+
+
+# Function to get the shared pool for a mode and options, created on first use.
+# Returns None once MAX_POOLS pools exist for other options.
+def get_pool(mode, options, capacity=DEFAULT_CAPACITY, low_water=DEFAULT_LOW_WATER):
+    key = (mode, json.dumps(options, sort_keys=True))
+    pool = _pools.get(key)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(key)
+            if pool is None:
+                if len(_pools) >= MAX_POOLS:
+                    return None
+                pool = _pools[key] = PasswordPool(mode, options, capacity, low_water, prefill=False)
+    return pool
+
+
+# Function to close and forget every shared pool
+def close_pools():
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.close()
+        _pools.clear()
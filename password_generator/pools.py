@@ -0,0 +1,61 @@
+import math
+from functools import lru_cache
+
+from .constants import (
+    AMBIGUOUS_CHARS,
+    DIGITS,
+    LOWERCASE,
+    SIMILAR_CHARS,
+    SPECIAL_CHARS,
+    UPPERCASE,
+)
+from .metrics import cached
+
+
+# Character pool for one combination of Random-mode options.
+# Built once per option tuple by get_char_pool and shared by every call after that.
+class CharPool:
+    def __init__(self, use_lower, use_upper, use_digits, use_special, exclude_similar, exclude_ambiguous):
+        self.options = (use_lower, use_upper, use_digits, use_special, exclude_similar, exclude_ambiguous)
+
+        # Filter each selected character class
+        classes = []
+        if use_lower:
+            classes.append(_filter(LOWERCASE, SIMILAR_CHARS if exclude_similar else ""))
+        if use_upper:
+            classes.append(_filter(UPPERCASE, SIMILAR_CHARS if exclude_similar else ""))
+        if use_digits:
+            classes.append(_filter(DIGITS, SIMILAR_CHARS if exclude_similar else ""))
+        if use_special:
+            classes.append(_filter(SPECIAL_CHARS, AMBIGUOUS_CHARS if exclude_ambiguous else ""))
+
+        # Required-class table: one entry per class that still has characters
+        self.required_classes = tuple(c for c in classes if c)
+
+        # Combined pool, with ambiguous characters removed from every class if requested
+        self.chars = _filter("".join(classes), AMBIGUOUS_CHARS if exclude_ambiguous else "")
+        self.size = len(self.chars)
+
+        # Entropy figures
+        self.bits_per_char = math.log2(self.size) if self.size else 0.0
+
+    def entropy(self, length):
+        return length * self.bits_per_char
+
+    def __repr__(self):
+        return f"CharPool(size={self.size}, classes={len(self.required_classes)})"
+
+
+# Function to remove excluded characters from a character set
+def _filter(chars, excluded):
+    if not excluded:
+        return chars
+    return chars.translate({ord(c): None for c in excluded})
+
+
+# Function to get the cached character pool for a combination of options
+@cached("char_pool")
+@lru_cache(maxsize=None)
+def get_char_pool(use_lower=True, use_upper=True, use_digits=True, use_special=True,
+                  exclude_similar=False, exclude_ambiguous=False):
+    return CharPool(use_lower, use_upper, use_digits, use_special, exclude_similar, exclude_ambiguous)
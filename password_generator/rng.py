@@ -0,0 +1,118 @@
+import os
+import random
+import weakref
+from array import array
+
+# 64-bit words a BufferedSource reads from the OS at a time
+DEFAULT_BUFFER_SIZE = 4096
+
+RNG_SOURCES = ["secrets", "buffered", "seeded"]
+
+# Scale of a 53-bit integer onto [0, 1), as random.Random uses
+_RECIP_BPF = 2 ** -53
+
+# Every live BufferedSource, so a forked child can drop the bytes it shares with its parent
+_buffered_sources = weakref.WeakSet()
+
+
+# Randomness sources. Every generator takes an optional rng: any random.Random instance, used
+# through choice, choices, sample, randrange, random and randbytes. Without one, the per-call
+# generators draw from DEFAULT_SOURCE and the batch generators read os.urandom directly; the
+# random module's Mersenne Twister is never used for a password unless asked for.
+# This one reads the OS CSPRNG on every draw, as the secrets module does.
+class SecretsSource(random.SystemRandom):
+    pass
+
+
+# Randomness from the OS CSPRNG, read buffer_size 64-bit words at a time and decoded in bulk
+# into words and floats that each draw pops off a list. list.pop is atomic, so no lock is
+# needed and no value is ever handed out twice, and a small draw costs a pop instead of a
+# system call. After a fork the child discards what it inherited, so parent and child never
+# hand out the same values.
+class BufferedSource(random.Random):
+    def __init__(self, buffer_size=DEFAULT_BUFFER_SIZE):
+        self.buffer_size = buffer_size
+        self._words = []
+        self._floats = []
+        super().__init__()
+        _buffered_sources.add(self)
+
+    # The state comes from the OS, so there is nothing to seed, save or restore
+    def seed(self, *args, **kwargs):
+        pass
+
+    def getstate(self):
+        raise NotImplementedError("BufferedSource has no state to save")
+
+    def setstate(self, state):
+        raise NotImplementedError("BufferedSource has no state to restore")
+
+    def _read_words(self):
+        words = array('Q')
+        words.frombytes(os.urandom(8 * self.buffer_size))
+        return words.tolist()
+
+    def _word(self):
+        try:
+            return self._words.pop()
+        except IndexError:
+            self._words = self._read_words()
+            return self._words.pop()
+
+    def random(self):
+        try:
+            return self._floats.pop()
+        except IndexError:
+            self._floats = [(word >> 11) * _RECIP_BPF for word in self._read_words()]
+            return self._floats.pop()
+
+    def getrandbits(self, k):
+        if k < 0:
+            raise ValueError("number of bits must be non-negative")
+        if k <= 64:
+            return self._word() >> (64 - k)
+        count = (k + 63) // 64
+        value = 0
+        for _ in range(count):
+            value = (value << 64) | self._word()
+        return value >> (count * 64 - k)
+
+    def randbytes(self, n):
+        # Bulk reads (the batch generators) gain nothing from the buffer
+        if n > 64:
+            return os.urandom(n)
+        return self.getrandbits(n * 8).to_bytes(n, 'big')
+
+    def _discard(self):
+        self._words = []
+        self._floats = []
+
+
+# Deterministic randomness from a seeded Mersenne Twister, so a run can be replayed byte for
+# byte. Fast, but predictable: only for load tests and benchmarks, never for real passwords.
+class SeededSource(random.Random):
+    pass
+
+
+def _discard_buffers_after_fork():
+    for source in list(_buffered_sources):
+        source._discard()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_discard_buffers_after_fork)
+
+
+# Source the per-call generators share when no rng is given: the OS CSPRNG, buffered
+DEFAULT_SOURCE = BufferedSource()
+
+
+# Function to create a randomness source by name ("secrets", "buffered" or "seeded")
+def make_source(name, seed=None):
+    if name == "secrets":
+        return SecretsSource()
+    if name == "buffered":
+        return BufferedSource()
+    if name == "seeded":
+        return SeededSource(0 if seed is None else seed)
+    raise ValueError(f"Unknown randomness source: {name}")
@@ -0,0 +1,74 @@
+import os
+from functools import lru_cache
+
+from .metrics import METRICS_ENABLED, cached, record_rejections
+
+
+# Function to build the byte translation tables for an alphabet.
+# Bytes below the largest multiple of len(alphabet) map onto the alphabet,
+# the rest are deleted so every symbol is equally likely (no modulo bias).
+@cached("byte_tables")
+@lru_cache(maxsize=None)
+def _byte_tables(alphabet):
+    size = len(alphabet)
+    if not 0 < size <= 256:
+        raise ValueError("Alphabet must contain between 1 and 256 symbols")
+    limit = 256 - 256 % size
+    table = bytes(alphabet[b % size] if b < limit else 0 for b in range(256))
+    rejected = bytes(range(limit, 256))
+    return table, rejected, limit
+
+
+# Function to read n random bytes from a randomness source, or the OS CSPRNG when rng is None
+def random_bytes(n, rng=None):
+    return os.urandom(n) if rng is None else rng.randbytes(n)
+
+
+# Function to draw count symbols uniformly from an alphabet of bytes using the OS CSPRNG
+# (or the given randomness source)
+def sample_bytes(alphabet, count, rng=None):
+    table, rejected, limit = _byte_tables(alphabet)
+    result = bytearray()
+    rounds = discarded = 0
+    while len(result) < count:
+        # Over-draw by the expected rejection rate so one read is usually enough
+        needed = count - len(result)
+        buffer = random_bytes(needed * 256 // limit + 16, rng)
+        kept = buffer.translate(table, rejected)
+        result += kept
+        rounds += 1
+        discarded += len(buffer) - len(kept)
+    if METRICS_ENABLED:
+        record_rejections("sample_bytes", rounds, discarded)
+    del result[count:]
+    return bytes(result)
+
+
+# Function to draw count characters uniformly from a string of single-byte characters
+def sample_chars(chars, count, rng=None):
+    return sample_bytes(chars.encode('latin-1'), count, rng).decode('latin-1')
+
+
+# Function to draw count integers uniformly from range(bound) using the OS CSPRNG.
+# Values are read as whole bytes masked to the bit length of bound; values >= bound
+# are rejected, so at least half of every read is kept.
+def sample_below(bound, count, rng=None):
+    if bound <= 256:
+        return list(sample_bytes(bytes(range(bound)), count, rng))
+    bits = (bound - 1).bit_length()
+    width = (bits + 7) // 8
+    mask = (1 << bits) - 1
+    values = []
+    rounds = draws = 0
+    while len(values) < count:
+        buffer = random_bytes((count - len(values)) * width * 2, rng)
+        for i in range(0, len(buffer), width):
+            value = int.from_bytes(buffer[i:i + width], 'big') & mask
+            if value < bound:
+                values.append(value)
+        rounds += 1
+        draws += len(buffer) // width
+    if METRICS_ENABLED:
+        record_rejections("sample_below", rounds, draws - len(values))
+    del values[count:]
+    return values
@@ -0,0 +1,480 @@
+import asyncio
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from http import HTTPStatus
+
+from .batch import generate_batch
+from .breach import check_password_breach
+from .constants import GENERATION_MODES
+from .entropy import estimate_entropy
+from .export import EXPORT_FORMATS, export_columns, format_rows, iter_rows
+from .metrics import render_metrics
+from .parallel import shard_sizes
+from .pool import close_pools, get_pool
+from .strength import calculate_strength
+from .wordlist import CHARSETS, wordlist_path
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8000
+
+# Requests for more passwords than this are generated in the worker pool
+INLINE_LIMIT = 1000
+# Requests scoring or breach checking more passwords than this are handled in the worker pool
+INLINE_ANALYSIS_LIMIT = 50
+# Requests for more passwords than this are streamed, as are requests with "stream": true
+STREAM_THRESHOLD = 10000
+# Passwords per streamed chunk, each generated and formatted by one worker task
+STREAM_SHARD_SIZE = 10000
+MAX_COUNT = 10_000_000
+# Largest generation options a client may ask for, checked before any policy, pattern or
+# model is compiled for them
+MAX_LENGTH = 1024
+MAX_WORD_COUNT = 64
+MAX_PATTERN_SIZE = 1024
+MAX_SEPARATOR_SIZE = 16
+# Options a client may set for each mode and the JSON type of each. Anything else, such as
+# rng, is refused before it reaches a generator.
+CLIENT_OPTIONS = {
+    "Random": {'length': int, 'use_lower': bool, 'use_upper': bool, 'use_digits': bool, 'use_special': bool,
+               'exclude_similar': bool, 'exclude_ambiguous': bool, 'ensure_all_types': bool},
+    "Pronounceable": {'length': int, 'capitalize': bool, 'add_number': bool, 'add_special': bool,
+                      'wordlist': str},
+    "PIN": {'length': int, 'avoid_repeats': bool, 'avoid_sequences': bool},
+    "Passphrase": {'word_count': int, 'separator': str, 'capitalize_words': bool, 'add_number': bool,
+                   'wordlist': str, 'min_word_length': int, 'max_word_length': int, 'charset': str},
+    "Custom Pattern": {'pattern': str},
+}
+# Options each mode cannot generate without
+REQUIRED_OPTIONS = {
+    "Random": ('length',),
+    "Pronounceable": ('length',),
+    "PIN": ('length',),
+    "Passphrase": ('word_count',),
+    "Custom Pattern": ('pattern',),
+}
+# Options that may also be null, leaving the generator's default
+NULLABLE_OPTIONS = {'wordlist', 'min_word_length', 'max_word_length', 'charset'}
+# Largest value of each integer option (the least is 1) and longest value of each string option
+OPTION_LIMITS = {
+    'length': MAX_LENGTH,
+    'word_count': MAX_WORD_COUNT,
+    'min_word_length': MAX_LENGTH,
+    'max_word_length': MAX_LENGTH,
+    'pattern': MAX_PATTERN_SIZE,
+    'separator': MAX_SEPARATOR_SIZE,
+}
+# Most passwords a single strength or breach request may check
+MAX_CHECK_ITEMS = 1000
+MAX_BODY_SIZE = 1 << 20
+MAX_HEADER_SIZE = 16 << 10
+# How worker processes are started. A forked worker would inherit the client sockets open at
+# the time, holding them open after the service closes them, so workers start from a fresh
+# process instead.
+WORKER_START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+CONTENT_TYPES = {
+    "txt": "text/plain; charset=utf-8",
+    "csv": "text/csv; charset=utf-8",
+    "jsonl": "application/x-ndjson",
+}
+
+
+# Error raised while handling a request, answered with its status and message
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+# Function run in a worker to generate and format one streamed chunk
+def _export_shard(mode, options, size, fmt, include_strength, include_breach, include_entropy, header):
+    rows = iter_rows(generate_batch(mode, options, size), include_strength, include_breach, include_entropy)
+    return format_rows(list(rows), fmt, export_columns(include_strength, include_breach, include_entropy), header)
+
+
+# Function run in a worker (or inline for small requests) to build a generate response body
+def _generate_result(mode, options, passwords, include_strength, include_breach, include_entropy):
+    if isinstance(passwords, int):
+        passwords = generate_batch(mode, options, passwords)
+    result = {'mode': mode, 'count': len(passwords)}
+    if include_strength or include_breach or include_entropy:
+        result['rows'] = list(iter_rows(passwords, include_strength, include_breach, include_entropy))
+    else:
+        result['passwords'] = passwords
+    return result
+
+
+# Function to check a client's generation options for a mode against the service limits,
+# returning the options to generate with. Only the mode's own options are accepted, each of its
+# JSON type, so nothing a client sends fails inside a generator. A word list is named by the
+# client and looked up in the operator's word list directory, so clients never pass file paths.
+def _client_options(mode, options):
+    if not isinstance(options, dict):
+        raise ValueError("options must be a JSON object")
+    allowed = CLIENT_OPTIONS[mode]
+    for name, value in options.items():
+        if name not in allowed:
+            raise ValueError(f"{mode} options are: {', '.join(allowed)}")
+        if value is None and name in NULLABLE_OPTIONS:
+            continue
+        kind = allowed[name]
+        limit = OPTION_LIMITS.get(name)
+        if kind is bool and type(value) is not bool:
+            raise ValueError(f"{name} must be true or false")
+        if kind is int and (type(value) is not int or not 1 <= value <= limit):
+            raise ValueError(f"{name} must be an integer from 1 to {limit:,}")
+        if kind is str and type(value) is not str:
+            raise ValueError(f"{name} must be a string")
+        if kind is str and limit is not None and len(value) > limit:
+            raise ValueError(f"{name} must be a string of at most {limit:,} characters")
+    for name in REQUIRED_OPTIONS[mode]:
+        if name not in options:
+            raise ValueError(f"{mode} options must include {name}")
+    if options.get('charset') is not None and options['charset'] not in CHARSETS:
+        raise ValueError(f"charset must be one of: {', '.join(CHARSETS)}")
+    if options.get('wordlist') is not None:
+        options = dict(options, wordlist=wordlist_path(options['wordlist']))
+    return options
+
+
+# Function run in a thread to take passwords from the shared pool for a mode and options,
+# or None when no pool can be kept for them
+def _take_pooled(mode, options, n):
+    pool = get_pool(mode, options)
+    return None if pool is None else pool.take_many(n)
+
+
+# Function to get the strength report for one password
+def _strength_report(password):
+    strength, category, color, feedback = calculate_strength(password)
+    return {
+        'password': password,
+        'strength': strength,
+        'category': category,
+        'feedback': feedback,
+        'entropy_bits': round(estimate_entropy(password).bits, 1),
+    }
+
+
+# Function to get the breach report for one password
+def _breach_report(password):
+    is_breached, breach_message = check_password_breach(password)
+    return {'password': password, 'breached': is_breached, 'message': breach_message}
+
+
+# Function run in a worker (or inline for small requests) to build a check response body
+def _check_result(report, passwords, many):
+    reports = [report(p) for p in passwords]
+    return {'results': reports} if many else reports[0]
+
+
+# Function to read the password or list of passwords a check request is about
+def _check_passwords(body):
+    if 'passwords' in body:
+        passwords = body['passwords']
+        if not isinstance(passwords, list) or not all(isinstance(p, str) for p in passwords):
+            raise ValueError("passwords must be a list of strings")
+        if len(passwords) > MAX_CHECK_ITEMS:
+            raise ValueError(f"At most {MAX_CHECK_ITEMS} passwords can be checked per request")
+    elif isinstance(body.get('password'), str):
+        passwords = [body['password']]
+    else:
+        raise ValueError("Request must include a password or a list of passwords")
+    if any(len(p) > MAX_LENGTH for p in passwords):
+        raise ValueError(f"Passwords longer than {MAX_LENGTH:,} characters cannot be checked")
+    return passwords, 'passwords' in body
+
+
+# Collects concurrent generation requests with the same mode and options and serves them
+# with one generate_batch call, flushed on the next event loop iteration. The batch runs in
+# a thread, so compiling new options never stalls the event loop.
+class BatchQueue:
+    def __init__(self):
+        self._pending = {}
+
+    async def generate(self, mode, options, n):
+        loop = asyncio.get_running_loop()
+        key = (mode, json.dumps(options, sort_keys=True))
+        waiting = self._pending.get(key)
+        if waiting is None:
+            waiting = self._pending[key] = []
+            loop.call_soon(self._flush, key, mode, options)
+        future = loop.create_future()
+        waiting.append((n, future))
+        return await future
+
+    def _flush(self, key, mode, options):
+        waiting = self._pending.pop(key)
+        batch = asyncio.ensure_future(asyncio.to_thread(generate_batch, mode, options,
+                                                        sum(n for n, future in waiting)))
+        batch.add_done_callback(lambda batch: self._deliver(waiting, batch))
+
+    def _deliver(self, waiting, batch):
+        if batch.cancelled() or batch.exception() is not None:
+            for n, future in waiting:
+                if not future.done():
+                    if batch.cancelled():
+                        future.cancel()
+                    else:
+                        future.set_exception(batch.exception())
+            return
+        passwords = batch.result()
+        start = 0
+        for n, future in waiting:
+            if not future.done():
+                future.set_result(passwords[start:start + n])
+            start += n
+
+
+# Asynchronous HTTP/JSON password service.
+# Connections are kept alive between requests. Small generation requests are coalesced per
+# mode and options and generated in a thread, as small checks are run; larger ones run in a
+# process pool, and the largest
+# are streamed back chunk by chunk, so no request blocks the event loop. With pooled=True,
+# small requests are served from pre-generated pools refilled in the background. Options are
+# checked against CLIENT_OPTIONS and OPTION_LIMITS before anything is generated, and a
+# "wordlist" option names a file in the PASSWORD_WORDLIST_DIR directory.
+#
+#   GET  /health                 {"status": "ok"}
+#   GET  /modes                  the generation modes
+#   GET  /metrics                instrumentation in Prometheus text format (PASSWORD_METRICS=1)
+#   POST /generate               {"mode", "options", "count", "strength", "breach", "entropy",
+#                                 "stream", "format"}
+#   POST /strength               {"password"} or {"passwords": [...]}
+#   POST /breach                 {"password"} or {"passwords": [...]}
+class PasswordService:
+    def __init__(self, workers=None, pooled=False):
+        self.workers = workers or os.cpu_count() or 1
+        self.pooled = pooled
+        self._executor = None
+        self._batches = BatchQueue()
+        self._routes = {
+            ("GET", "/health"): self._health,
+            ("GET", "/modes"): self._modes,
+            ("GET", "/metrics"): self._metrics,
+            ("POST", "/generate"): self._generate,
+            ("POST", "/strength"): self._strength,
+            ("POST", "/breach"): self._breach,
+        }
+
+    # Function to get the worker pool, created on first use (serve creates it before accepting
+    # connections). Workers start with WORKER_START_METHOD, so they hold no client sockets.
+    def executor(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                 mp_context=multiprocessing.get_context(WORKER_START_METHOD))
+        return self._executor
+
+    # Function to run a CPU-bound call in the worker pool without blocking the event loop
+    async def _run(self, function, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor(), function, *args)
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+        if self.pooled:
+            close_pools()
+
+    # Function to serve one client connection until it closes or asks to
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                except HTTPError as e:
+                    await self._send_json(writer, e.status, {'error': str(e)}, keep_alive=False)
+                    break
+                if request is None:
+                    break
+                method, path, keep_alive, body = request
+                try:
+                    handler = self._routes.get((method, path))
+                    if handler is None:
+                        if any(route_path == path for _, route_path in self._routes):
+                            raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED, f"{method} is not allowed on {path}")
+                        raise HTTPError(HTTPStatus.NOT_FOUND, f"No such endpoint: {path}")
+                    await handler(writer, body, keep_alive)
+                except HTTPError as e:
+                    await self._send_json(writer, e.status, {'error': str(e)}, keep_alive)
+                except ValueError as e:
+                    await self._send_json(writer, HTTPStatus.BAD_REQUEST, {'error': str(e)}, keep_alive)
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    raise
+                except Exception:
+                    # Anything else is a server fault; its message may name server files, so it is not sent
+                    await self._send_json(writer, HTTPStatus.INTERNAL_SERVER_ERROR,
+                                          {'error': "Internal server error"}, keep_alive=False)
+                    break
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    # Function to read one request, returning (method, path, keep_alive, parsed JSON body),
+    # or None when the client closed the connection
+    async def _read_request(self, reader):
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+        except asyncio.IncompleteReadError as e:
+            if e.partial.strip():
+                raise HTTPError(HTTPStatus.BAD_REQUEST, "Incomplete request")
+            return None
+        except asyncio.LimitOverrunError:
+            raise HTTPError(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE, "Request headers too large")
+
+        lines = head.decode("latin-1").split("\r\n")
+        try:
+            method, target, version = lines[0].split(" ")
+        except ValueError:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Malformed request line")
+        headers = {}
+        for line in lines[1:]:
+            name, sep, value = line.partition(":")
+            if sep:
+                headers[name.strip().lower()] = value.strip()
+
+        connection = headers.get("connection", "").lower()
+        keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+
+        try:
+            length = int(headers.get("content-length") or 0)
+        except ValueError:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Invalid Content-Length")
+        if length < 0:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Invalid Content-Length")
+        if length > MAX_BODY_SIZE:
+            raise HTTPError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Request body too large")
+        body = {}
+        if length:
+            data = await reader.readexactly(length)
+            try:
+                body = json.loads(data)
+            except ValueError:
+                raise HTTPError(HTTPStatus.BAD_REQUEST, "Request body is not valid JSON")
+            if not isinstance(body, dict):
+                raise HTTPError(HTTPStatus.BAD_REQUEST, "Request body must be a JSON object")
+        return method, target.split("?", 1)[0], keep_alive, body
+
+    async def _send(self, writer, status, content_type, payload, keep_alive):
+        head = (f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+                f"Content-Type: {content_type}\r\n"
+                f"Content-Length: {len(payload)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        writer.write(head.encode("latin-1") + payload)
+        await writer.drain()
+
+    async def _send_json(self, writer, status, data, keep_alive):
+        await self._send(writer, status, "application/json", json.dumps(data).encode("utf-8"), keep_alive)
+
+    async def _health(self, writer, body, keep_alive):
+        await self._send_json(writer, HTTPStatus.OK, {'status': 'ok'}, keep_alive)
+
+    async def _modes(self, writer, body, keep_alive):
+        await self._send_json(writer, HTTPStatus.OK, {'modes': GENERATION_MODES}, keep_alive)
+
+    async def _metrics(self, writer, body, keep_alive):
+        await self._send(writer, HTTPStatus.OK, "text/plain; version=0.0.4; charset=utf-8",
+                         render_metrics().encode("utf-8"), keep_alive)
+
+    async def _generate(self, writer, body, keep_alive):
+        mode = body.get('mode', "Random")
+        if mode not in GENERATION_MODES:
+            raise ValueError(f"Unknown generation mode: {mode}")
+        options = _client_options(mode, body.get('options', {}))
+        count = body.get('count', 1)
+        if not isinstance(count, int) or not 1 <= count <= MAX_COUNT:
+            raise ValueError(f"count must be an integer from 1 to {MAX_COUNT:,}")
+        include_strength = bool(body.get('strength'))
+        include_breach = bool(body.get('breach'))
+        include_entropy = bool(body.get('entropy'))
+
+        if body.get('stream') or count > STREAM_THRESHOLD:
+            fmt = body.get('format', "jsonl")
+            if fmt not in EXPORT_FORMATS:
+                raise ValueError(f"Unknown export format: {fmt}")
+            await self._stream(writer, mode, options, count, fmt, include_strength, include_breach, include_entropy,
+                               keep_alive)
+            return
+
+        analysis = include_strength or include_breach or include_entropy
+        if count > (INLINE_ANALYSIS_LIMIT if analysis else INLINE_LIMIT):
+            result = await self._run(_generate_result, mode, options, count,
+                                     include_strength, include_breach, include_entropy)
+        else:
+            # Serve from a pre-generated pool for these options when pooling is on
+            passwords = await asyncio.to_thread(_take_pooled, mode, options, count) if self.pooled else None
+            if passwords is None:
+                passwords = await self._batches.generate(mode, options, count)
+            result = await asyncio.to_thread(_generate_result, mode, options, passwords,
+                                             include_strength, include_breach, include_entropy)
+        await self._send_json(writer, HTTPStatus.OK, result, keep_alive)
+
+    # Function to stream a large generation as chunked text. Each chunk is generated and
+    # formatted in the worker pool, with the next chunk already running while one is sent.
+    async def _stream(self, writer, mode, options, count, fmt, include_strength, include_breach, include_entropy,
+                      keep_alive):
+        # Check the options before committing to a 200 response
+        await self._run(generate_batch, mode, options, 1)
+
+        sizes = shard_sizes(count, STREAM_SHARD_SIZE)
+        pending = [asyncio.ensure_future(self._run(_export_shard, mode, options, size, fmt,
+                                                   include_strength, include_breach, include_entropy, i == 0))
+                   for i, size in enumerate(sizes[:self.workers + 1])]
+        next_shard = len(pending)
+
+        writer.write((f"HTTP/1.1 200 OK\r\nContent-Type: {CONTENT_TYPES[fmt]}\r\n"
+                      f"Transfer-Encoding: chunked\r\n"
+                      f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n").encode("latin-1"))
+        try:
+            while pending:
+                text = (await pending.pop(0)).encode("utf-8")
+                if next_shard < len(sizes):
+                    pending.append(asyncio.ensure_future(self._run(_export_shard, mode, options, sizes[next_shard], fmt,
+                                                                   include_strength, include_breach,
+                                                                   include_entropy, False)))
+                    next_shard += 1
+                writer.write(b"%x\r\n%s\r\n" % (len(text), text))
+                await writer.drain()
+            writer.write(b"0\r\n\r\n")
+            await writer.drain()
+        except ConnectionError:
+            raise
+        except Exception as e:
+            # The status line is already sent, so the only way to report a failure is to drop the connection
+            raise ConnectionAbortedError(str(e)) from e
+        finally:
+            for future in pending:
+                future.cancel()
+
+    async def _check(self, writer, body, keep_alive, report):
+        passwords, many = _check_passwords(body)
+        if len(passwords) > INLINE_ANALYSIS_LIMIT:
+            result = await self._run(_check_result, report, passwords, many)
+        else:
+            result = await asyncio.to_thread(_check_result, report, passwords, many)
+        await self._send_json(writer, HTTPStatus.OK, result, keep_alive)
+
+    async def _strength(self, writer, body, keep_alive):
+        await self._check(writer, body, keep_alive, _strength_report)
+
+    async def _breach(self, writer, body, keep_alive):
+        await self._check(writer, body, keep_alive, _breach_report)
+
+
+# Function to run the service until cancelled
+async def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, workers=None, ready=None, pooled=False):
+    service = PasswordService(workers, pooled)
+    service.executor()
+    server = await asyncio.start_server(service.handle_connection, host, port, limit=MAX_HEADER_SIZE)
+    if ready is not None:
+        ready(server)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.close()
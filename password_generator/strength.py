@@ -0,0 +1,141 @@
+import string
+
+from .metrics import instrumented
+
+# Character classes used by the strength checks (ASCII only, like the original regex checks)
+LOWER_SET = frozenset(string.ascii_lowercase)
+UPPER_SET = frozenset(string.ascii_uppercase)
+DIGIT_SET = frozenset(string.digits)
+ALNUM_SET = LOWER_SET | UPPER_SET | DIGIT_SET
+
+# Bit flags describing a password; together with its length bucket they fully determine the score
+HAS_LOWER = 1
+HAS_UPPER = 2
+HAS_DIGIT = 4
+HAS_SPECIAL = 8
+HAS_TRIPLE = 16
+LOW_VARIETY = 32
+
+
+# Function to compute the score for a length bucket and set of flags
+def _score(length_bucket, flags):
+    strength = 0
+    feedback = []
+
+    # Length check
+    if length_bucket == 2:
+        strength += 25
+        feedback.append("Good length")
+    elif length_bucket == 1:
+        strength += 15
+        feedback.append("Acceptable length")
+    else:
+        feedback.append("Password is too short")
+
+    # Character variety checks
+    if flags & HAS_LOWER:
+        strength += 10
+    else:
+        feedback.append("Missing lowercase letters")
+
+    if flags & HAS_UPPER:
+        strength += 10
+    else:
+        feedback.append("Missing uppercase letters")
+
+    if flags & HAS_DIGIT:
+        strength += 10
+    else:
+        feedback.append("Missing numbers")
+
+    if flags & HAS_SPECIAL:
+        strength += 15
+    else:
+        feedback.append("Missing special characters")
+
+    # Complexity checks
+    if flags & HAS_TRIPLE:
+        strength -= 10
+        feedback.append("Contains repeating characters")
+
+    if flags & LOW_VARIETY:
+        strength -= 5
+        feedback.append("Low character variety")
+
+    # Categorize strength
+    if strength >= 60:
+        category = "Strong"
+        color = "green"
+    elif strength >= 40:
+        category = "Moderate"
+        color = "orange"
+    else:
+        category = "Weak"
+        color = "red"
+
+    return strength, category, color, tuple(feedback)
+
+
+# Every possible score, indexed by length bucket and then by flags
+SCORE_TABLE = [[_score(bucket, flags) for flags in range(64)] for bucket in range(3)]
+
+
+# Function to get the length bucket used by the length check
+def _length_bucket(length):
+    if length >= 12:
+        return 2
+    if length >= 8:
+        return 1
+    return 0
+
+
+# Function to classify a password in a single scan.
+# Building the set of distinct characters is the only pass over the password; the class
+# flags and the variety ratio come from that set, and the triple-repeat check only runs
+# when there are enough duplicate characters for a run of three to exist.
+def _classify(password, length):
+    chars = set(password)
+    distinct = len(chars)
+    flags = 0
+    if not chars.isdisjoint(LOWER_SET):
+        flags |= HAS_LOWER
+    if not chars.isdisjoint(UPPER_SET):
+        flags |= HAS_UPPER
+    if not chars.isdisjoint(DIGIT_SET):
+        flags |= HAS_DIGIT
+    if not chars <= ALNUM_SET:
+        flags |= HAS_SPECIAL
+    # A newline never counts as a repeat, matching the original (.)\1\1 check
+    if distinct <= length - 2 and any(c * 3 in password for c in chars if c != '\n'):
+        flags |= HAS_TRIPLE
+    if distinct < length * 0.75:
+        flags |= LOW_VARIETY
+    return flags
+
+
+# Function to calculate password strength
+@instrumented("calculate_strength")
+def calculate_strength(password):
+    length = len(password)
+    strength, category, color, feedback = SCORE_TABLE[_length_bucket(length)][_classify(password, length)]
+    return strength, category, color, list(feedback)
+
+
+# Function to score many passwords at once, returning the same tuples as calculate_strength.
+# Runs of passwords with the same length (the usual case for generated batches) share the
+# length bucket and score row instead of recomputing them per password.
+@instrumented("score_batch")
+def score_batch(passwords):
+    results = []
+    append = results.append
+    classify = _classify
+    scores = None
+    fixed_length = None
+    for password in passwords:
+        length = len(password)
+        if length != fixed_length:
+            fixed_length = length
+            scores = SCORE_TABLE[_length_bucket(length)]
+        strength, category, color, feedback = scores[classify(password, length)]
+        append((strength, category, color, list(feedback)))
+    return results
@@ -0,0 +1,89 @@
+import math
+import warnings
+
+from .batch import generate_batch
+from .fingerprint import FingerprintSet, password_fingerprint
+from .markov import pronounceable_entropy
+from .pattern import compile_pattern
+from .pin import pin_keyspace
+from .policy import compile_policy
+from .wordlist import resolve_wordlist
+
+# Passwords generated per round of unique generation
+DEFAULT_UNIQUE_CHUNK = 10000
+# Fraction of a namespace in use past which generation warns that it is close to exhausted
+EXHAUSTION_WARNING = 0.5
+# Rounds in a row that may produce no new password before the namespace counts as exhausted
+MAX_STALLED_ROUNDS = 16
+# Modes whose keyspace is an estimate, so running past it is not an error by itself
+ESTIMATED_KEYSPACES = {"Pronounceable"}
+
+
+# Warning raised when a run will use up most of the passwords a mode can produce
+class NamespaceWarning(UserWarning):
+    pass
+
+
+# Function to get how many distinct passwords a mode can produce with the given options.
+# Pronounceable passwords are not uniform, so their keyspace is estimated from the entropy.
+def mode_keyspace(mode, options):
+    if mode == "Random":
+        return compile_policy(**options).keyspace
+    if mode == "PIN":
+        return pin_keyspace(options['length'], options.get('avoid_repeats', True), options.get('avoid_sequences', True))
+    if mode == "Passphrase":
+        words = resolve_wordlist(options.get('wordlist'), options.get('min_word_length'),
+                                 options.get('max_word_length'), options.get('charset'))
+        numbers = 90 if options.get('add_number', True) else 1
+        return math.perm(len(words), options['word_count']) * numbers
+    if mode == "Custom Pattern":
+        return compile_pattern(options['pattern']).keyspace
+    if mode == "Pronounceable":
+        return round(2 ** pronounceable_entropy(options['length'], options.get('add_number', True),
+                                                options.get('add_special', True), options.get('wordlist')))
+    return None
+
+
+# Function to lazily yield n passwords that are distinct from each other and from every
+# fingerprint already in seen (a FingerprintSet, or a FingerprintIndex for a namespace kept
+# across runs). Repeats are redrawn, so the output is uniform over the unused passwords.
+# Raises ValueError if the namespace cannot hold n more passwords.
+def iter_unique(mode, options, n, seen=None, chunk_size=DEFAULT_UNIQUE_CHUNK, rng=None):
+    if seen is None:
+        seen = FingerprintSet(n)
+    keyspace = mode_keyspace(mode, options)
+    if keyspace:
+        if len(seen) + n > keyspace and mode not in ESTIMATED_KEYSPACES:
+            raise ValueError(f"Only {max(keyspace - len(seen), 0):,} of the {keyspace:,} possible {mode} "
+                             f"passwords are unused, {n:,} were requested")
+        if (len(seen) + n) / keyspace >= EXHAUSTION_WARNING:
+            warnings.warn(f"This run brings the namespace to {(len(seen) + n) / keyspace:.0%} of the "
+                          f"{keyspace:,} possible {mode} passwords; new passwords will get slower to find "
+                          f"and it will soon be exhausted", NamespaceWarning, stacklevel=2)
+
+    remaining = n
+    stalled = 0
+    while remaining > 0:
+        # Draw extra to make up for the share expected to be repeats
+        unused = 1 - len(seen) / keyspace if keyspace else 1
+        count = min(chunk_size, math.ceil(remaining / max(unused, 1 / chunk_size)))
+        fresh = []
+        for password in generate_batch(mode, options, count, rng):
+            if seen.add(password_fingerprint(password)):
+                fresh.append(password)
+                if len(fresh) == remaining:
+                    break
+        if fresh:
+            stalled = 0
+        else:
+            # An exact keyspace was checked above, so only an estimated one can run dry
+            stalled += 1
+            if stalled >= MAX_STALLED_ROUNDS and (not keyspace or mode in ESTIMATED_KEYSPACES):
+                raise ValueError(f"The namespace is exhausted: no new {mode} password in {stalled} rounds")
+        remaining -= len(fresh)
+        yield from fresh
+
+
+# Function to generate n distinct passwords and return them as a list
+def generate_unique(mode, options, n, seen=None, chunk_size=DEFAULT_UNIQUE_CHUNK, rng=None):
+    return list(iter_unique(mode, options, n, seen, chunk_size, rng))
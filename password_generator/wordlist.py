@@ -0,0 +1,232 @@
+import math
+import mmap
+import os
+import struct
+from array import array
+from collections.abc import Sequence
+from functools import lru_cache
+
+from .constants import COMMON_WORDS
+from .metrics import cached
+
+# File layout (little-endian):
+#   header      magic, word count
+#   offsets     word count + 1 uint32 offsets into the word data
+#   lengths     one byte per word: length in characters, capped at 255
+#   charsets    one byte per word: CHARSET_* flags describing its characters
+#   data        the UTF-8 encoded words, back to back
+MAGIC = b"PGWORDS1"
+HEADER = struct.Struct("<8sI")
+
+# Charset flags stored per word; a word matches a charset if it has that flag
+CHARSET_LOWER = 1
+CHARSET_ALPHA = 2
+CHARSET_ALNUM = 4
+CHARSET_ASCII = 8
+# Directory the operator puts word list files in. The app and the service only accept word
+# lists by name from this directory; without it they offer just the built-in list.
+WORDLIST_DIR_ENV = "PASSWORD_WORDLIST_DIR"
+
+# Word list files load_wordlist caches at once. Past this the least recently used one leaves
+# the cache, but its file stays mapped until nothing refers to it: a filtered view of it or a
+# passphrase being drawn from it keeps the mapping, which is closed when it is garbage collected.
+MAX_OPEN_WORDLISTS = 8
+
+CHARSETS = {
+    "lower": CHARSET_LOWER,
+    "alpha": CHARSET_ALPHA,
+    "alnum": CHARSET_ALNUM,
+    "ascii": CHARSET_ASCII,
+}
+
+
+# Function to compute the charset flags for a word
+def _charset_flags(word):
+    flags = 0
+    if word.isascii():
+        flags |= CHARSET_ASCII
+        if word.isalnum():
+            flags |= CHARSET_ALNUM
+        if word.isalpha():
+            flags |= CHARSET_ALPHA
+            if word.islower():
+                flags |= CHARSET_LOWER
+    return flags
+
+
+# An indexed word list. Words are looked up by position through the offset table, so a
+# memory-mapped list costs no startup time and its pages are shared between processes.
+class WordList(Sequence):
+    def __init__(self, offsets, lengths, charsets, data, name=None):
+        self._offsets = offsets
+        self._lengths = lengths
+        self._charsets = charsets
+        self._data = data
+        self._mm = None
+        self.name = name
+
+    # Function to build an in-memory word list from an iterable of words (duplicates dropped)
+    @classmethod
+    def from_words(cls, words, name=None):
+        words = list(dict.fromkeys(w for w in words if w))
+        offsets = array("I", [0])
+        data = bytearray()
+        for word in words:
+            data += word.encode("utf-8")
+            offsets.append(len(data))
+        lengths = bytes(min(len(w), 255) for w in words)
+        charsets = bytes(_charset_flags(w) for w in words)
+        return cls(memoryview(offsets), lengths, charsets, bytes(data), name)
+
+    # Function to open a word list file memory-mapped
+    @classmethod
+    def open(cls, path):
+        with open(path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, count = HEADER.unpack_from(mm)
+        if magic != MAGIC:
+            mm.close()
+            raise ValueError(f"{path} is not a word list file")
+        view = memoryview(mm)
+        start = HEADER.size
+        offsets = view[start:start + (count + 1) * 4].cast("I")
+        start += (count + 1) * 4
+        lengths = view[start:start + count]
+        charsets = view[start + count:start + 2 * count]
+        data = view[start + 2 * count:]
+        wordlist = cls(offsets, lengths, charsets, data, path)
+        wordlist._mm = mm
+        return wordlist
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, len(self)))
+            f.write(self._offsets.tobytes())
+            f.write(self._lengths)
+            f.write(self._charsets)
+            f.write(self._data[:self._offsets[-1]])
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        return bytes(self._data[self._offsets[index]:self._offsets[index + 1]]).decode("utf-8")
+
+    def __repr__(self):
+        return f"WordList({self.name or 'in-memory'}, {len(self):,} words)"
+
+    # Function to get the entropy in bits of one word drawn uniformly from the list
+    @property
+    def bits_per_word(self):
+        return math.log2(len(self)) if len(self) else 0.0
+
+    # Function to get the words matching a length range and charset, as a view over this list.
+    # The matching positions come from the stored length and charset bytes without decoding
+    # any words, and are cached per filter.
+    def filter(self, min_length=None, max_length=None, charset=None):
+        return _filtered(self, min_length, max_length, charset)
+
+
+# A subset of a word list, addressed through an index of positions in the full list
+class FilteredWordList(Sequence):
+    def __init__(self, wordlist, positions):
+        self.wordlist = wordlist
+        self.positions = positions
+
+    def __len__(self):
+        return len(self.positions)
+
+    def __getitem__(self, index):
+        return self.wordlist[self.positions[index]]
+
+    def __repr__(self):
+        return f"FilteredWordList({len(self):,} of {len(self.wordlist):,} words)"
+
+    @property
+    def bits_per_word(self):
+        return math.log2(len(self)) if len(self) else 0.0
+
+
+@cached("wordlist_filter")
+@lru_cache(maxsize=64)
+def _filtered(wordlist, min_length, max_length, charset):
+    if charset and charset not in CHARSETS:
+        raise ValueError(f"Unknown charset: {charset}")
+    required = CHARSETS[charset] if charset else 0
+    low = min_length or 0
+    high = max_length if max_length is not None else 255
+    lengths = wordlist._lengths
+    charsets = wordlist._charsets
+    positions = array("I", (i for i in range(len(wordlist))
+                             if low <= lengths[i] <= high and charsets[i] & required == required))
+    if not positions:
+        raise ValueError("No words match the word list filter")
+    return FilteredWordList(wordlist, positions)
+
+
+# Function to open a word list by file path, once per path while it stays in the cache
+@cached("wordlist_files")
+@lru_cache(maxsize=MAX_OPEN_WORDLISTS)
+def load_wordlist(path):
+    return WordList.open(path)
+
+
+# Function to list the names of the word list files in the configured directory
+def available_wordlists(directory=None):
+    directory = directory or os.environ.get(WORDLIST_DIR_ENV)
+    if not directory or not os.path.isdir(directory):
+        return []
+    return sorted(name for name in os.listdir(directory) if os.path.isfile(os.path.join(directory, name)))
+
+
+# Function to get the path of a word list picked by name from the configured directory.
+# Only names listed there are accepted, so a name from a user never reaches another file.
+def wordlist_path(name, directory=None):
+    if name not in available_wordlists(directory):
+        raise ValueError(f"Unknown word list: {name}")
+    return os.path.join(directory or os.environ[WORDLIST_DIR_ENV], name)
+
+
+# Function to get the built-in word list
+@lru_cache(maxsize=None)
+def default_wordlist():
+    return WordList.from_words(COMMON_WORDS, "built-in")
+
+
+# Function to convert a text word list into the indexed binary format.
+# Accepts one word per line, or Diceware/EFF lines such as "11111<TAB>abacus"
+# (the last field is used). Returns the number of words written.
+def build_wordlist(source_path, dest_path):
+    with open(source_path, "r", encoding="utf-8") as f:
+        words = (line.split()[-1] for line in f if line.strip())
+        wordlist = WordList.from_words(words, dest_path)
+    wordlist.save(dest_path)
+    return len(wordlist)
+
+
+# Function to get the words a passphrase is drawn from: the built-in list, a WordList,
+# or a word list file path, optionally filtered by word length and charset
+def resolve_wordlist(wordlist=None, min_word_length=None, max_word_length=None, charset=None):
+    filtered = min_word_length is not None or max_word_length is not None or charset
+    if wordlist is None:
+        if not filtered:
+            return COMMON_WORDS
+        wordlist = default_wordlist()
+    elif isinstance(wordlist, str):
+        wordlist = load_wordlist(wordlist)
+    if filtered:
+        return wordlist.filter(min_word_length, max_word_length, charset)
+    return wordlist
+
+
+# Function to get the entropy in bits of a passphrase: distinct words drawn in order,
+# plus the two-digit number when one is added
+def passphrase_entropy(word_count, add_number=True, wordlist=None, min_word_length=None,
+                       max_word_length=None, charset=None):
+    words = resolve_wordlist(wordlist, min_word_length, max_word_length, charset)
+    bits = math.log2(math.perm(len(words), word_count)) if word_count <= len(words) else 0.0
+    if add_number:
+        bits += math.log2(90)
+    return bits
@@ -0,0 +1,16 @@
+from password_generator import BreachIndex, check_password_breach
+
+
+# Function standing in for the configured index, which a passed index must never fall back to
+def _configured_index():
+    raise AssertionError("the configured breach index was used")
+
+
+def test_empty_index_is_used_rather_than_replaced(tmp_path, monkeypatch):
+    path = tmp_path / "empty.bin"
+    path.write_bytes(b"")
+    monkeypatch.setattr("password_generator.breach.get_breach_filter", lambda: None)
+    monkeypatch.setattr("password_generator.breach.get_breach_index", _configured_index)
+    with BreachIndex(str(path), with_counts=False) as index:
+        assert len(index) == 0
+        assert check_password_breach("Vq7!rTz2#kLp9w", index=index) == (False, "No breaches found for this password.")
@@ -0,0 +1,30 @@
+import pytest
+
+from password_generator.cli import main
+from password_generator.constants import GENERATION_MODES
+
+
+def test_generate_with_default_options(capsys):
+    assert main(["generate", "-n", "3"]) == 0
+    passwords = capsys.readouterr().out.splitlines()
+    assert len(passwords) == 3
+    assert all(len(password) == 16 for password in passwords)
+
+
+@pytest.mark.parametrize("mode", GENERATION_MODES)
+def test_every_mode_has_defaults(capsys, mode):
+    assert main(["generate", "--mode", mode, "-n", "2"]) == 0
+    assert len(capsys.readouterr().out.splitlines()) == 2
+
+
+def test_options_override_defaults(capsys):
+    assert main(["generate", "--mode", "PIN", "--options", '{"length": 9}']) == 0
+    assert len(capsys.readouterr().out.strip()) == 9
+
+
+@pytest.mark.parametrize("options", ["[16]", "{length: 16}"])
+def test_options_must_be_a_json_object(capsys, options):
+    with pytest.raises(SystemExit) as exit_info:
+        main(["generate", "--options", options])
+    assert exit_info.value.code == 2
+    assert "argument --options" in capsys.readouterr().err
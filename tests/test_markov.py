@@ -0,0 +1,50 @@
+import math
+import re
+
+from password_generator import (
+    SeededSource,
+    generate_batch,
+    generate_pronounceable_password,
+    get_markov_model,
+    pronounceable_entropy,
+    pronounceable_length,
+)
+from password_generator.markov import TARGET_BITS
+
+# Four or more consonants in a row; y counts as a vowel, as in "rhythm"
+CONSONANT_RUN_RE = re.compile(r'[bcdfghjklmnpqrstvwxz]{4,}', re.IGNORECASE)
+
+
+# Function to get the share of passwords with a run of four or more consonants
+def _consonant_run_share(passwords):
+    return sum(1 for password in passwords if CONSONANT_RUN_RE.search(password)) / len(passwords)
+
+
+def test_consonant_runs_stay_rare():
+    length = pronounceable_length()
+    batch = generate_batch("Pronounceable", {'length': length}, 20000, SeededSource(1))
+    single = [generate_pronounceable_password(length, rng=SeededSource(seed)) for seed in range(2000)]
+    assert _consonant_run_share(batch) < 0.01
+    assert _consonant_run_share(single) < 0.01
+
+
+def test_reported_entropy_matches_sampled_letters():
+    model = get_markov_model()
+    letters = 9
+    samples = model.sample_batch(20000, letters, SeededSource(2))
+    surprisal = 0.0
+    for text in samples:
+        for i, char in enumerate(text):
+            chars, cumulative, total, entropy = model._next(text[:i])
+            index = chars.index(char)
+            count = cumulative[index] - (cumulative[index - 1] if index else 0)
+            surprisal -= math.log2(count / total)
+    assert abs(surprisal / len(samples) - model.entropy(letters)) < 0.02 * model.entropy(letters)
+
+
+def test_default_length_is_shortest_to_reach_target():
+    for add_number in (True, False):
+        for add_special in (True, False):
+            length = pronounceable_length(add_number=add_number, add_special=add_special)
+            assert pronounceable_entropy(length, add_number, add_special) >= TARGET_BITS
+            assert pronounceable_entropy(length - 1, add_number, add_special) < TARGET_BITS
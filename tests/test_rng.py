@@ -0,0 +1,46 @@
+import random
+
+import pytest
+
+from password_generator import check_password_breach, generate_password
+
+DEFAULT_CASES = [
+    ("Random", {'length': 16}),
+    ("Random", {'length': 8, 'use_special': False, 'exclude_similar': True}),
+    ("Pronounceable", {'length': 12}),
+    ("PIN", {'length': 6}),
+    ("Passphrase", {'word_count': 4}),
+    ("Custom Pattern", {'pattern': "aaaA-999#"}),
+]
+
+
+# Fixture making every module-level function of the random module raise
+@pytest.fixture
+def no_random_module(monkeypatch):
+    def forbidden(*args, **kwargs):
+        raise AssertionError("the random module was used")
+
+    for name in ("random", "randrange", "randint", "choice", "choices", "sample", "shuffle",
+                 "getrandbits", "randbytes", "seed"):
+        monkeypatch.setattr(random, name, forbidden)
+
+
+@pytest.mark.parametrize("mode, options", DEFAULT_CASES)
+def test_default_source_never_uses_random_module(no_random_module, mode, options):
+    assert generate_password(mode, options)
+
+
+def test_breach_simulation_never_uses_random_module(no_random_module, monkeypatch):
+    monkeypatch.setattr("password_generator.breach.get_breach_filter", lambda: None)
+    monkeypatch.setattr("password_generator.breach.get_breach_index", lambda: None)
+    breached, message = check_password_breach("Vq7!rTz2#kLp9w")
+    assert message
+
+
+@pytest.mark.parametrize("mode, options", DEFAULT_CASES)
+def test_seeding_random_module_does_not_repeat_passwords(mode, options):
+    drawn = set()
+    for _ in range(3):
+        random.seed(0)
+        drawn.add(tuple(generate_password(mode, options) for _ in range(4)))
+    assert len(drawn) == 3
@@ -0,0 +1,98 @@
+import asyncio
+import json
+import socket
+import threading
+
+import pytest
+
+from password_generator.service import INLINE_LIMIT, _client_options, serve
+
+
+# Fixture running the service on a free port in a background thread, yielding the port
+@pytest.fixture
+def service_port():
+    started = threading.Event()
+    state = {}
+
+    def ready(server):
+        state['port'] = server.sockets[0].getsockname()[1]
+        started.set()
+
+    def run():
+        loop = asyncio.new_event_loop()
+        state['loop'] = loop
+        state['task'] = loop.create_task(serve("127.0.0.1", 0, workers=1, ready=ready))
+        try:
+            loop.run_until_complete(state['task'])
+        except asyncio.CancelledError:
+            pass
+        finally:
+            loop.close()
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    assert started.wait(60)
+    yield state['port']
+    state['loop'].call_soon_threadsafe(state['task'].cancel)
+    thread.join(60)
+
+
+# Function to send one raw HTTP request and read the response until the server closes the connection
+def _request_to_eof(port, path, body):
+    payload = json.dumps(body).encode("utf-8")
+    with socket.create_connection(("127.0.0.1", port), timeout=60) as client:
+        client.sendall(f"POST {path} HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n"
+                       f"Content-Type: application/json\r\nContent-Length: {len(payload)}\r\n\r\n".encode("latin-1")
+                       + payload)
+        response = b""
+        while True:
+            data = client.recv(65536)
+            if not data:
+                return response
+            response += data
+
+
+def test_connection_close_reaches_eof_after_a_pooled_request(service_port):
+    # More than INLINE_LIMIT passwords runs in the worker pool, which must not keep the socket open
+    response = _request_to_eof(service_port, "/generate", {'mode': "PIN", 'options': {'length': 6},
+                                                           'count': INLINE_LIMIT + 1})
+    head, _, body = response.partition(b"\r\n\r\n")
+    assert head.startswith(b"HTTP/1.1 200")
+    assert b"Connection: close" in head
+    assert json.loads(body)['count'] == INLINE_LIMIT + 1
+
+    # A later connection closes just the same once workers are running
+    response = _request_to_eof(service_port, "/generate", {'mode': "PIN", 'options': {'length': 6}, 'count': 2})
+    assert json.loads(response.partition(b"\r\n\r\n")[2])['count'] == 2
+
+
+@pytest.mark.parametrize("mode, options", [
+    ("Random", {'length': 16, 'rng': "seeded"}),
+    ("Random", {'length': 16, 'word_count': 4}),
+    ("Random", {'length': "16"}),
+    ("Random", {'length': True}),
+    ("Random", {'length': 16, 'use_lower': 1}),
+    ("Random", {'use_lower': True}),
+    ("PIN", {'length': 0}),
+    ("Passphrase", {'word_count': 4, 'separator': "-" * 17}),
+    ("Passphrase", {'word_count': 4, 'charset': "klingon"}),
+    ("Custom Pattern", {'pattern': ["a"]}),
+    ("Custom Pattern", []),
+])
+def test_client_options_are_refused(mode, options):
+    with pytest.raises(ValueError):
+        _client_options(mode, options)
+
+
+def test_client_options_keep_valid_options():
+    options = {'word_count': 5, 'separator': " ", 'capitalize_words': True, 'wordlist': None, 'charset': "lower"}
+    assert _client_options("Passphrase", options) == options
+
+
+def test_refused_options_get_a_fixed_message(service_port):
+    response = _request_to_eof(service_port, "/generate", {'mode': "Random", 'options': {'length': 8, 'rng': 1}})
+    head, _, body = response.partition(b"\r\n\r\n")
+    assert head.startswith(b"HTTP/1.1 400")
+    error = json.loads(body)['error']
+    assert error.startswith("Random options are: length,")
+    assert "_batch" not in error and "rng" not in error